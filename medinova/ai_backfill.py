@@ -0,0 +1,256 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+from medinova.api import SUMMARY_MAX_CHARS, SUMMARY_MODEL, build_summary_prompt
+from medinova.clinical_search import INDEXED_FIELDS, insert_postings
+from medinova.day_sheet import invalidate_patient_day_sheets
+from medinova.patient_search import to_filter_list
+
+CHECKPOINT_KEY = "medinova_ai_backfill_checkpoint"
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+MAX_ATTEMPTS = 4
+
+
+class RateLimitError(Exception):
+    """Raised by a provider when the upstream API asks us to slow down."""
+
+
+class SummaryProvider(ABC):
+    @abstractmethod
+    async def summarize(self, prompt):
+        """Returns the summary text for `prompt`; raises RateLimitError when throttled upstream."""
+
+
+class GeminiProvider(SummaryProvider):
+    def __init__(self, model=SUMMARY_MODEL):
+        import google.generativeai as genai
+
+        api_key = frappe.conf.get("gemini_api_key")
+        if not api_key:
+            frappe.throw("Gemini API key is not set in site_config.json.")
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model)
+
+    async def summarize(self, prompt):
+        from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+
+        try:
+            response = await self.model.generate_content_async(prompt)
+        except (ResourceExhausted, TooManyRequests) as e:
+            raise RateLimitError(str(e))
+        return response.text
+
+
+class MockProvider(SummaryProvider):
+    """Local provider for tests and dry runs: fixed latency, optional simulated 429s."""
+
+    def __init__(self, latency=0.05, rate_limit_every=0):
+        self.latency = float(latency)
+        self.rate_limit_every = cint(rate_limit_every)
+        self.calls = 0
+
+    async def summarize(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.rate_limit_every and self.calls % self.rate_limit_every == 0:
+            raise RateLimitError("mock rate limit")
+        notes = prompt.rsplit("Clinical Notes:", 1)[-1].split("Output:", 1)[0].strip()
+        return f"Summary:\n- {notes[:200]}"
+
+
+PROVIDERS = {"gemini": GeminiProvider, "mock": MockProvider}
+
+
+def get_provider(provider):
+    if isinstance(provider, SummaryProvider):
+        return provider
+    if provider in PROVIDERS:
+        return PROVIDERS[provider]()
+    return frappe.get_attr(provider)()
+
+
+class AsyncRateLimiter:
+    """
+    Spaces requests to stay under a per-minute budget. A rate-limit response
+    halves the budget; it recovers gradually as calls succeed.
+    """
+
+    def __init__(self, requests_per_minute):
+        self.max_rate = float(requests_per_minute)
+        self.rate = self.max_rate
+        self.next_slot = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = max(self.next_slot - now, 0)
+            self.next_slot = max(self.next_slot, now) + 60.0 / self.rate
+        if delay:
+            await asyncio.sleep(delay)
+
+    def throttle(self):
+        self.rate = max(self.rate / 2, 1.0)
+
+    def recover(self):
+        self.rate = min(self.rate * 1.05, self.max_rate)
+
+
+async def summarize_encounters(provider, encounters, concurrency, limiter):
+    """Summarises a batch with at most `concurrency` requests in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def summarize_one(encounter):
+        async with semaphore:
+            for attempt in range(MAX_ATTEMPTS):
+                await limiter.wait()
+                try:
+                    summary = await provider.summarize(build_summary_prompt(encounter.clinical_notes))
+                    limiter.recover()
+                    return encounter, summary.strip()[:SUMMARY_MAX_CHARS]
+                except RateLimitError:
+                    limiter.throttle()
+                    await asyncio.sleep(2**attempt)
+                except Exception as e:
+                    frappe.log_error(f"AI summary backfill failed for {encounter.name}: {e}", "AI Agent Error")
+                    return encounter, None
+            return encounter, None
+
+    return await asyncio.gather(*(summarize_one(e) for e in encounters))
+
+
+def fetch_batch(after, batch_size, filters=None):
+    """Next unsummarised encounters in name order (keyset, so each batch is an index range read)."""
+    return frappe.get_all(
+        "Patient Encounter",
+        filters=[
+            *to_filter_list(filters),
+            ["name", ">", after or ""],
+            ["clinical_notes", "is", "set"],
+            ["ai_summary", "is", "not set"],
+        ],
+        fields=["name", "patient", "practitioner", *INDEXED_FIELDS],
+        order_by="name asc",
+        limit=batch_size,
+    )
+
+
+def write_summaries(results):
+    """Writes a batch of summaries in one UPDATE and refreshes their search postings and day sheets."""
+    done = [(encounter, summary) for encounter, summary in results if summary]
+    if not done:
+        return 0
+
+    cases = " ".join(["WHEN %s THEN %s"] * len(done))
+    values = [v for encounter, summary in done for v in (encounter.name, summary)]
+    names = [encounter.name for encounter, summary in done]
+    frappe.db.sql(
+        f"""
+        UPDATE `tabPatient Encounter`
+        SET ai_summary = CASE name {cases} END, modified = %s, modified_by = %s
+        WHERE name IN %s
+        """,
+        (*values, now_datetime(), frappe.session.user, tuple(names)),
+    )
+
+    for encounter, summary in done:
+        encounter.ai_summary = summary
+    frappe.db.delete("Encounter Search Posting", {"encounter": ("in", names)})
+    insert_postings([encounter for encounter, summary in done])
+    invalidate_patient_day_sheets({encounter.patient for encounter, summary in done})
+    return len(done)
+
+
+def get_checkpoint():
+    return frappe.defaults.get_global_default(CHECKPOINT_KEY) or ""
+
+
+def set_checkpoint(name):
+    frappe.defaults.set_global_default(CHECKPOINT_KEY, name)
+
+
+def backfill_ai_summaries(
+    provider="gemini",
+    batch_size=DEFAULT_BATCH_SIZE,
+    concurrency=DEFAULT_CONCURRENCY,
+    requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+    limit=None,
+    reset=False,
+    echo=None,
+    filters=None,
+):
+    """
+    Summarises every encounter that has notes but no AI summary (and matches
+    `filters`, if given). Progress is checkpointed after each batch, so an
+    interrupted run resumes where it left off; `reset` starts over from the
+    first encounter (e.g. to retry failures).
+    """
+    provider = get_provider(provider)
+    batch_size = cint(batch_size) or DEFAULT_BATCH_SIZE
+    concurrency = cint(concurrency) or DEFAULT_CONCURRENCY
+    limiter = AsyncRateLimiter(requests_per_minute or DEFAULT_REQUESTS_PER_MINUTE)
+    echo = echo or (lambda message: None)
+
+    if reset:
+        set_checkpoint("")
+        frappe.db.commit()
+
+    checkpoint = get_checkpoint()
+    stats = {"processed": 0, "summarised": 0, "failed": 0}
+    started = time.monotonic()
+
+    loop = asyncio.new_event_loop()
+    try:
+        while not limit or stats["processed"] < cint(limit):
+            size = min(batch_size, cint(limit) - stats["processed"]) if limit else batch_size
+            encounters = fetch_batch(checkpoint, size, filters)
+            if not encounters:
+                break
+
+            results = loop.run_until_complete(summarize_encounters(provider, encounters, concurrency, limiter))
+            written = write_summaries(results)
+
+            checkpoint = encounters[-1].name
+            set_checkpoint(checkpoint)
+            frappe.db.commit()
+
+            stats["processed"] += len(encounters)
+            stats["summarised"] += written
+            stats["failed"] += len(encounters) - written
+            elapsed = time.monotonic() - started
+            echo(
+                f"{stats['processed']} processed, {stats['summarised']} summarised, {stats['failed']} failed"
+                f" | {stats['processed'] / elapsed:.2f} encounters/s | checkpoint {checkpoint}"
+            )
+    finally:
+        loop.close()
+
+    stats["elapsed_secs"] = round(time.monotonic() - started, 2)
+    stats["per_sec"] = round(stats["processed"] / stats["elapsed_secs"], 2) if stats["elapsed_secs"] else 0
+    stats["checkpoint"] = checkpoint
+    return stats
+
+
+@frappe.whitelist()
+def enqueue_ai_summary_backfill(provider="gemini", batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY, reset=0):
+    frappe.only_for("System Manager")
+    if provider not in PROVIDERS:
+        frappe.throw(f"Unknown summary provider: {provider}")
+
+    frappe.enqueue(
+        "medinova.ai_backfill.backfill_ai_summaries",
+        queue="long",
+        timeout=6 * 60 * 60,
+        job_id="medinova_ai_summary_backfill",
+        deduplicate=True,
+        provider=provider,
+        batch_size=cint(batch_size),
+        concurrency=cint(concurrency),
+        reset=cint(reset),
+    )
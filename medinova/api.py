@@ -1,9 +1,27 @@
 import frappe
 from datetime import datetime, timedelta
 from frappe.utils import getdate, get_datetime, now_datetime
+from medinova.revenue import invalidate_days
+from medinova.slots import get_cached_start_times
+from medinova.waitlist import get_active_holds
 
 @frappe.whitelist()
 def get_available_start_times(practitioner, appointment_date, appointment_type):
+    """
+    Available start times, served from a short-lived cache shared by identical
+    concurrent lookups and retired as soon as a booking for that day changes.
+    """
+    if not (practitioner and appointment_date and appointment_type):
+        return {"available_slots": []}
+
+    return get_cached_start_times(
+        practitioner,
+        appointment_date,
+        appointment_type,
+        lambda: compute_available_start_times(practitioner, appointment_date, appointment_type),
+    )
+
+def compute_available_start_times(practitioner, appointment_date, appointment_type):
     """
     Finds available start times for a service with a variable duration by calculating
     the free "gaps" in a practitioner's schedule.
@@ -32,6 +50,11 @@ def get_available_start_times(practitioner, appointment_date, appointment_type):
         fields=["start_time", "end_time"],
         order_by="start_time"
     )
+    # Slots held for a waitlisted patient are not on offer to anyone else until the hold lapses.
+    booked_appointments = sorted(
+        booked_appointments + get_active_holds(practitioner, appointment_date),
+        key=lambda b: get_datetime(f"{appointment_date} {b.start_time}"),
+    )
 
     available_start_times = []
     last_known_free_time = day_start
@@ -47,7 +70,7 @@ def get_available_start_times(practitioner, appointment_date, appointment_type):
                 available_start_times.append(potential_start.strftime("%H:%M"))
                 potential_start += timedelta(minutes=15)
 
-        last_known_free_time = booking_end
+        last_known_free_time = max(last_known_free_time, booking_end)
 
     final_free_block_duration = day_end - last_known_free_time
     if final_free_block_duration >= required_duration:
@@ -56,7 +79,7 @@ def get_available_start_times(practitioner, appointment_date, appointment_type):
             available_start_times.append(potential_start.strftime("%H:%M"))
             potential_start += timedelta(minutes=15)
 
-    return {"available_slots": sorted(list(set(available_start_times)))}
+    return {"available_slots": sorted(list(set(available_start_times))), "duration_mins": duration_mins}
 
 @frappe.whitelist()
 def update_past_appointment_statuses():
@@ -140,6 +163,7 @@ def calculate_encounter_bill(encounter_name):
     encounter.db_set('total_medicine_cost', medicine_cost)
     encounter.db_set('total_service_cost', service_cost)
     encounter.db_set('grand_total', grand_total)
+    invalidate_days([encounter.encounter_datetime])
     
     return {
         "grand_total": grand_total
@@ -152,31 +176,16 @@ def calculate_encounter_bill(encounter_name):
 from frappe.model.document import Document
 import frappe
 import google.generativeai as genai
+from medinova.clinical_search import index_encounter
+from medinova.day_sheet import invalidate_patient_day_sheets
 
-@frappe.whitelist()
-def summarize_clinical_notes(encounter_name):
-    doc = frappe.get_doc("Patient Encounter", encounter_name)
-
-    if not doc.clinical_notes:
-        msg = "No clinical notes to summarize."
-        doc.db_set('ai_summary', msg)
-        return msg
-
-    api_key = frappe.conf.get("gemini_api_key")
-    if not api_key:
-        msg = "Error: Gemini API key not set in site_config.json."
-        frappe.log_error(msg, "AI Agent Error")
-        doc.db_set('ai_summary', msg)
-        return msg
-
-    try:
-        
-        genai.configure(api_key=api_key)
+SUMMARY_MODEL = "models/gemini-2.5-pro"
+SUMMARY_MAX_CHARS = 1400
 
-        model = genai.GenerativeModel("models/gemini-2.5-pro")
 
-        # 🧠 Enhanced instruction prompt
-        prompt = f"""
+def build_summary_prompt(clinical_notes):
+    # 🧠 Enhanced instruction prompt
+    return f"""
         You are an expert medical language model assisting doctors.
         The following are rough, shorthand, or incomplete clinical notes written in a hurry.
 
@@ -195,18 +204,45 @@ def summarize_clinical_notes(encounter_name):
         - Possible cardiac cause under evaluation
 
         Clinical Notes:
-        {doc.clinical_notes}
+        {clinical_notes}
 
         Output:
         """
 
+
+@frappe.whitelist()
+def summarize_clinical_notes(encounter_name):
+    doc = frappe.get_doc("Patient Encounter", encounter_name)
+
+    if not doc.clinical_notes:
+        msg = "No clinical notes to summarize."
+        doc.db_set('ai_summary', msg)
+        return msg
+
+    api_key = frappe.conf.get("gemini_api_key")
+    if not api_key:
+        msg = "Error: Gemini API key not set in site_config.json."
+        frappe.log_error(msg, "AI Agent Error")
+        doc.db_set('ai_summary', msg)
+        return msg
+
+    try:
+        
+        genai.configure(api_key=api_key)
+
+        model = genai.GenerativeModel(SUMMARY_MODEL)
+
+        prompt = build_summary_prompt(doc.clinical_notes)
+
         response = model.generate_content(prompt)
         summary = response.text.strip()
 
 
-        summary = summary[:1400]
+        summary = summary[:SUMMARY_MAX_CHARS]
 
         doc.db_set('ai_summary', summary)
+        index_encounter(doc, force=True)
+        invalidate_patient_day_sheets([doc.patient])
         return summary
 
     except Exception as e:
@@ -221,6 +257,7 @@ import frappe
 import google.generativeai as genai
 from frappe.utils import nowdate
 import re, json
+from medinova.patient_search import best_patient_match
 
 @frappe.whitelist()
 def get_slots_from_natural_language(message, conversation_history):
@@ -301,7 +338,7 @@ def get_slots_from_natural_language(message, conversation_history):
         if not slots.get("available_slots"):
             return {"message": f"Sorry, no slots available for {entities['practitioner']} on {entities['appointment_date']}."}
 
-        return {"slots": slots.get("available_slots"), "entities": entities}
+        return {"slots": slots.get("available_slots"), "entities": entities, "duration_mins": slots.get("duration_mins")}
 
     except Exception as e:
         frappe.log_error(f"AI Parse Error: {e}\nResponse: {ai_response}", "AI Chatbot Error")
@@ -316,6 +353,7 @@ def create_appointment_from_chat(patient_name, practitioner, appointment_date, s
             frappe.db.get_value("Patient", {"full_name": patient_name})
             or frappe.db.get_value("Patient", {"email": frappe.session.user})
             or frappe.db.get_value("Patient", {"owner": frappe.session.user})
+            or best_patient_match(patient_name)
         )
         if not patient_id:
             frappe.throw(f"No patient found for {patient_name} or {frappe.session.user}")
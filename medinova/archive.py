@@ -0,0 +1,318 @@
+import time
+
+import frappe
+from frappe.utils import add_days, cint, flt, getdate, nowdate
+
+DEFAULT_HORIZON_DAYS = 365
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE_SECS = 0.5
+DEFAULT_MAX_MINUTES = 60
+
+# Closed-record rules per hot doctype. Encounters go first so that appointments
+# are only archived once no hot encounter links to them any more.
+ARCHIVE_RULES = {
+    "Patient Encounter": {
+        "date_field": "encounter_datetime",
+        "condition": "payment_status = 'Paid'",
+    },
+    "Make Appointment": {
+        "date_field": "appointment_date",
+        "condition": """status IN ('Completed', 'Cancelled')
+            AND NOT EXISTS (
+                SELECT 1 FROM `tabPatient Encounter` enc WHERE enc.appointment = `tabMake Appointment`.name
+            )""",
+    },
+}
+
+# Records that link to an archived row and are opened and saved as documents
+# move into their own archive table with it, so no hot record is left with a
+# link that fails validation. Derived rows (search postings, vital readings)
+# stay hot: they keep archived encounters searchable and in vitals trends.
+LINKED_RECORDS = {
+    "Patient Encounter": {"Encounter Payment": ["patient_encounter"]},
+    "Make Appointment": {
+        "Appointment Waitlist": ["source_appointment", "booked_appointment"],
+        "Reminder Log": ["appointment"],
+    },
+}
+
+
+def get_archive_doctype(doctype):
+    return f"{doctype} Archive"
+
+
+def archive_exists(doctype):
+    return frappe.db.table_exists(get_archive_doctype(doctype))
+
+
+def get_child_doctypes(doctype):
+    return sorted({df.options for df in frappe.get_meta(doctype).get_table_fields()})
+
+
+def get_moved_doctypes(doctype):
+    """Everything archiving `doctype` moves: the doctype, the records linked to it and their child tables."""
+    doctypes = [doctype, *LINKED_RECORDS.get(doctype, {})]
+    return [*doctypes, *(child for dt in doctypes for child in get_child_doctypes(dt))]
+
+
+def get_archived_doctypes():
+    """Doctypes that already have rows in an archive table."""
+    doctypes = dict.fromkeys(dt for doctype in ARCHIVE_RULES for dt in get_moved_doctypes(doctype))
+    return [dt for dt in doctypes if archive_exists(dt)]
+
+
+def get_columns(table):
+    return frappe.db.sql(
+        """
+        SELECT column_name, column_type
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY ordinal_position
+        """,
+        table,
+    )
+
+
+def ensure_archive_table(doctype):
+    """
+    Creates `tab<doctype> Archive` with the hot table's columns and indexes, and
+    adds any column the hot table gained since (new fields after a migrate).
+    Returns the hot table's column names.
+    """
+    table, archive_table = f"tab{doctype}", f"tab{get_archive_doctype(doctype)}"
+    frappe.db.sql_ddl(f"CREATE TABLE IF NOT EXISTS `{archive_table}` LIKE `{table}`")
+
+    columns = get_columns(table)
+    archived = {name for name, column_type in get_columns(archive_table)}
+    for name, column_type in columns:
+        if name not in archived:
+            frappe.db.sql_ddl(f"ALTER TABLE `{archive_table}` ADD COLUMN `{name}` {column_type}")
+
+    frappe.cache.delete_value("db_tables")
+    return [name for name, column_type in columns]
+
+
+def get_archivable(doctype, cutoff, limit):
+    rule = ARCHIVE_RULES[doctype]
+    return frappe.db.sql_list(
+        f"""
+        SELECT name FROM `tab{doctype}`
+        WHERE {rule['date_field']} < %(cutoff)s AND {rule['condition']}
+        ORDER BY {rule['date_field']}
+        LIMIT %(limit)s
+        """,
+        {"cutoff": cutoff, "limit": limit},
+    )
+
+
+def move_rows(doctype, columns, condition, values):
+    fields = ", ".join(f"`{c}`" for c in columns)
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{get_archive_doctype(doctype)}` ({fields})
+        SELECT {fields} FROM `tab{doctype}` WHERE {condition}
+        """,
+        values,
+    )
+    frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE {condition}", values)
+
+
+def move_records(doctype, names, columns):
+    """Moves parents and their child rows."""
+    for child_doctype in get_child_doctypes(doctype):
+        move_rows(
+            child_doctype,
+            columns[child_doctype],
+            "parenttype = %(parenttype)s AND parent IN %(names)s",
+            {"parenttype": doctype, "names": tuple(names)},
+        )
+    move_rows(doctype, columns[doctype], "name IN %(names)s", {"names": tuple(names)})
+
+
+def move_linked_records(doctype, names, columns):
+    for linked_doctype, fields in LINKED_RECORDS.get(doctype, {}).items():
+        linked = frappe.db.sql_list(
+            f"SELECT name FROM `tab{linked_doctype}` WHERE " + " OR ".join(f"`{f}` IN %(names)s" for f in fields),
+            {"names": tuple(names)},
+        )
+        if linked:
+            move_records(linked_doctype, linked, columns)
+
+
+def archive_batch(doctype, names, columns):
+    """Moves one batch of parents, the records linked to them and all child rows in a single transaction."""
+    move_linked_records(doctype, names, columns)
+    move_records(doctype, names, columns)
+    frappe.db.commit()
+
+
+def archive_doctype(doctype, cutoff, batch_size, pause_secs, deadline):
+    columns = {dt: ensure_archive_table(dt) for dt in get_moved_doctypes(doctype)}
+    moved = 0
+    while time.monotonic() < deadline:
+        names = get_archivable(doctype, cutoff, batch_size)
+        if not names:
+            break
+        archive_batch(doctype, names, columns)
+        moved += len(names)
+        # Let replication and the booking path catch up between batches.
+        time.sleep(pause_secs)
+    return moved
+
+
+def archive_closed_records():
+    """
+    Daily long job: moves closed appointments and encounters older than the
+    horizon (site_config `medinova_archive_horizon_days`) into their archive
+    tables in small batches, stopping after `medinova_archive_max_minutes` and
+    carrying on the next day.
+    """
+    horizon = cint(frappe.conf.get("medinova_archive_horizon_days")) or DEFAULT_HORIZON_DAYS
+    batch_size = cint(frappe.conf.get("medinova_archive_batch_size")) or DEFAULT_BATCH_SIZE
+    pause_secs = flt(frappe.conf.get("medinova_archive_pause_secs", DEFAULT_PAUSE_SECS))
+    max_minutes = cint(frappe.conf.get("medinova_archive_max_minutes")) or DEFAULT_MAX_MINUTES
+
+    cutoff = getdate(add_days(nowdate(), -horizon))
+    deadline = time.monotonic() + max_minutes * 60
+    return {
+        doctype: archive_doctype(doctype, cutoff, batch_size, pause_secs, deadline)
+        for doctype in ARCHIVE_RULES
+    }
+
+
+def archive_stranded_records(batch_size=DEFAULT_BATCH_SIZE):
+    """Moves linked records left hot by archive runs from before LINKED_RECORDS existed."""
+    for doctype, linked_records in LINKED_RECORDS.items():
+        if not archive_exists(doctype):
+            continue
+        columns = {dt: ensure_archive_table(dt) for dt in get_moved_doctypes(doctype)}
+        archived = f"SELECT name FROM `tab{get_archive_doctype(doctype)}`"
+        for linked_doctype, fields in linked_records.items():
+            linked = frappe.db.sql_list(
+                f"SELECT name FROM `tab{linked_doctype}` WHERE "
+                + " OR ".join(f"`{f}` IN ({archived})" for f in fields)
+            )
+            for i in range(0, len(linked), batch_size):
+                move_records(linked_doctype, linked[i : i + batch_size], columns)
+                frappe.db.commit()
+
+
+def check_archived_links(doc, method=None):
+    """
+    Frappe's delete-time link check only reads hot tables. Refuses to delete a
+    record that archived rows still link to, so they are never orphaned.
+    """
+    for doctype in get_archived_doctypes():
+        for df in frappe.get_meta(doctype).get_link_fields():
+            if df.options != doc.doctype:
+                continue
+            linked = frappe.db.sql_list(
+                f"SELECT name FROM `tab{get_archive_doctype(doctype)}` WHERE `{df.fieldname}` = %s LIMIT 1",
+                doc.name,
+            )
+            if linked:
+                frappe.throw(
+                    f"Cannot delete {doc.doctype} {doc.name} because archived {doctype} {linked[0]} is linked with it",
+                    frappe.LinkExistsError,
+                )
+
+
+def rename_archived_links(doctype, old, new):
+    """`frappe.rename_doc` only updates links in hot tables; archived rows follow the rename here."""
+    for archived_doctype in get_archived_doctypes():
+        for df in frappe.get_meta(archived_doctype).get_link_fields():
+            if df.options == doctype:
+                frappe.db.sql(
+                    f"UPDATE `tab{get_archive_doctype(archived_doctype)}` SET `{df.fieldname}` = %s"
+                    f" WHERE `{df.fieldname}` = %s",
+                    (new, old),
+                )
+
+
+def get_tables(doctype):
+    """The hot table, then the archive table once archival has run."""
+    tables = [f"tab{doctype}"]
+    if archive_exists(doctype):
+        tables.append(f"tab{get_archive_doctype(doctype)}")
+    return tables
+
+
+def get_permitted_archived(doctype, names, ptype="read"):
+    """
+    Archived `names` the session user has `ptype` on. `frappe.get_list` only
+    reads the hot table, so each archived row is checked as an unsaved document.
+    """
+    if not names or not archive_exists(doctype):
+        return []
+    rows = frappe.db.sql(
+        f"SELECT * FROM `tab{get_archive_doctype(doctype)}` WHERE name IN %s", (tuple(names),), as_dict=True
+    )
+    return [
+        row.name
+        for row in rows
+        if frappe.has_permission(doctype, ptype, doc=frappe.get_doc({**row, "doctype": doctype}))
+    ]
+
+
+def build_conditions(filters):
+    """WHERE clause for simple filters: {field: value} or {field: (operator, value)}."""
+    conditions, values = [], {}
+    for i, (field, value) in enumerate((filters or {}).items()):
+        operator, value = value if isinstance(value, (list, tuple)) else ("=", value)
+        operator = operator.lower()
+        key = f"f{i}"
+        if operator == "between":
+            conditions.append(f"`{field}` BETWEEN %({key}_from)s AND %({key}_to)s")
+            values[f"{key}_from"], values[f"{key}_to"] = value
+        elif operator in ("in", "not in"):
+            conditions.append(f"`{field}` {operator} %({key})s")
+            values[key] = tuple(value) or ("",)
+        elif operator in ("=", "!=", "<", ">", "<=", ">=", "like"):
+            conditions.append(f"`{field}` {operator} %({key})s")
+            values[key] = value
+        else:
+            frappe.throw(f"Unsupported filter operator: {operator}")
+    return " AND ".join(conditions) or "1=1", values
+
+
+def union_table(doctype, fields):
+    """
+    A derived table over hot and archived rows of `doctype`, for reads that must
+    span both (history, reports). Falls back to the hot table before the first
+    archive run.
+    """
+    columns = ", ".join(f"`{f}`" for f in fields)
+    if not archive_exists(doctype):
+        return f"(SELECT {columns} FROM `tab{doctype}`)"
+    return (
+        f"(SELECT {columns} FROM `tab{doctype}`"
+        f" UNION ALL SELECT {columns} FROM `tab{get_archive_doctype(doctype)}`)"
+    )
+
+
+def get_all_with_archive(doctype, filters=None, fields=None, order_by=None, limit_start=0, limit_page_length=0):
+    """
+    `frappe.get_all` across hot and archive storage. Each side is filtered,
+    sorted and limited on its own indexes before the two are merged, so a page
+    never reads more than `limit_start + limit_page_length` rows from either.
+    """
+    fields = fields or ["name"]
+    order_by = order_by or "modified desc"
+    conditions, values = build_conditions(filters)
+    columns = ", ".join(f"`{f}`" for f in fields)
+    limit_start, limit_page_length = cint(limit_start), cint(limit_page_length)
+    branch_limit = f"LIMIT {limit_start + limit_page_length}" if limit_page_length else ""
+
+    branches = [f"(SELECT {columns} FROM `tab{doctype}` WHERE {conditions} ORDER BY {order_by} {branch_limit})"]
+    if archive_exists(doctype):
+        branches.append(
+            f"(SELECT {columns} FROM `tab{get_archive_doctype(doctype)}`"
+            f" WHERE {conditions} ORDER BY {order_by} {branch_limit})"
+        )
+
+    limit = f"LIMIT {limit_start}, {limit_page_length}" if limit_page_length else ""
+    return frappe.db.sql(
+        f"SELECT * FROM ({' UNION ALL '.join(branches)}) t ORDER BY {order_by} {limit}",
+        values,
+        as_dict=True,
+    )
@@ -0,0 +1,339 @@
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import frappe
+from frappe.utils import cint, get_datetime, get_system_timezone, get_time, getdate, now_datetime
+
+from medinova.archive import get_tables
+from medinova.timeline import ENCOUNTER_CHILD_TABLES, get_child_rows
+
+WATERMARK_KEY = "medinova_export_watermark:{}"
+WRITE_CHUNK_ROWS = 1000
+KEYSET_BATCH_SIZE = 1000
+
+# Child tables to nest under each exported parent; flat doctypes are streamed off a server-side cursor.
+EXPORT_DOCTYPES = {
+    "Patient": {},
+    "Make Appointment": {},
+    "Patient Encounter": ENCOUNTER_CHILD_TABLES,
+    "Encounter Payment": {},
+}
+
+APPOINTMENT_STATUS = {
+    "Booked": "booked",
+    "Confirmed": "booked",
+    "Checked-in": "checked-in",
+    "Completed": "fulfilled",
+    "Cancelled": "cancelled",
+}
+
+
+def _ref(doctype, name):
+    return {"reference": f"{doctype}/{name}"} if name else None
+
+
+def _compact(resource):
+    return {k: v for k, v in resource.items() if v not in (None, "", [], {})}
+
+
+def _instant(value, time=None):
+    """
+    FHIR dateTime for a stored datetime, or for a date plus a Time column value:
+    zero-padded ISO 8601 with the system timezone's offset, e.g.
+    2025-11-20T09:00:00+05:30. Stored values are naive system-timezone times.
+    """
+    if not value:
+        return None
+    moment = datetime.combine(getdate(value), get_time(time)) if time is not None else get_datetime(value)
+    return moment.replace(tzinfo=ZoneInfo(get_system_timezone())).isoformat(timespec="seconds")
+
+
+def patient_to_fhir(row):
+    telecom = []
+    if row.get("contact_number"):
+        telecom.append({"system": "phone", "value": row["contact_number"]})
+    if row.get("email"):
+        telecom.append({"system": "email", "value": row["email"]})
+
+    return _compact(
+        {
+            "resourceType": "Patient",
+            "id": row["name"],
+            "meta": {"lastUpdated": _instant(row.get("modified"))},
+            "identifier": [{"value": row.get("patient_id") or row["name"]}],
+            "name": [{"text": row.get("full_name")}] if row.get("full_name") else [],
+            "gender": {"Male": "male", "Female": "female", "Other": "other"}.get(row.get("gender"), "unknown"),
+            "birthDate": row.get("date_of_birth"),
+            "telecom": telecom,
+            "address": [{"text": row["address"]}] if row.get("address") else [],
+        }
+    )
+
+
+def appointment_to_fhir(row):
+    date = row.get("appointment_date")
+    return _compact(
+        {
+            "resourceType": "Appointment",
+            "id": row["name"],
+            "meta": {"lastUpdated": _instant(row.get("modified"))},
+            "status": APPOINTMENT_STATUS.get(row.get("status"), "proposed"),
+            "serviceType": [{"text": row["appointment_type"]}] if row.get("appointment_type") else [],
+            "start": _instant(date, row["start_time"]) if date and row.get("start_time") else None,
+            "end": _instant(date, row["end_time"]) if date and row.get("end_time") else None,
+            "description": row.get("notes"),
+            "participant": [
+                p
+                for p in (
+                    {"actor": _ref("Patient", row.get("patient")), "status": "accepted"},
+                    {"actor": _ref("Practitioner", row.get("practitioner")), "status": "accepted"},
+                )
+                if p["actor"]
+            ],
+        }
+    )
+
+
+def encounter_to_fhir(row):
+    contained = []
+    for i, vital in enumerate(row.get("vitals") or []):
+        contained.append(
+            _compact(
+                {
+                    "resourceType": "Observation",
+                    "id": f"vital-{i + 1}",
+                    "status": "final",
+                    "category": [{"text": "vital-signs"}],
+                    "code": {"text": vital.get("vital_name")},
+                    "valueString": " ".join(filter(None, [str(vital.get("value") or ""), vital.get("units")])),
+                    "effectiveDateTime": _instant(vital.get("measured_at")),
+                }
+            )
+        )
+    for i, prescription in enumerate(row.get("prescriptions") or []):
+        contained.append(
+            _compact(
+                {
+                    "resourceType": "MedicationRequest",
+                    "id": f"rx-{i + 1}",
+                    "status": "active",
+                    "intent": "order",
+                    "medicationCodeableConcept": {"text": prescription.get("medicine")},
+                    "dosageInstruction": [
+                        _compact(
+                            {
+                                "text": " ".join(
+                                    filter(None, [prescription.get("dose"), prescription.get("frequency")])
+                                ),
+                                "patientInstruction": prescription.get("instructions"),
+                            }
+                        )
+                    ],
+                }
+            )
+        )
+    for i, service in enumerate(row.get("services_performed") or []):
+        contained.append(
+            {
+                "resourceType": "Procedure",
+                "id": f"service-{i + 1}",
+                "status": "completed",
+                "code": {"text": service.get("service_item")},
+            }
+        )
+
+    return _compact(
+        {
+            "resourceType": "Encounter",
+            "id": row["name"],
+            "meta": {"lastUpdated": _instant(row.get("modified"))},
+            "status": "finished",
+            "subject": _ref("Patient", row.get("patient")),
+            "participant": [{"individual": _ref("Practitioner", row["practitioner"])}]
+            if row.get("practitioner")
+            else [],
+            "appointment": [_ref("Appointment", row["appointment"])] if row.get("appointment") else [],
+            "period": _compact({"start": _instant(row.get("encounter_datetime"))}),
+            "reasonCode": [{"text": row["chief_complaint"]}] if row.get("chief_complaint") else [],
+            "contained": contained,
+        }
+    )
+
+
+def payment_to_fhir(row):
+    return _compact(
+        {
+            "resourceType": "PaymentReconciliation",
+            "id": row["name"],
+            "meta": {"lastUpdated": _instant(row.get("modified"))},
+            "status": "cancelled" if row.get("docstatus") == 2 else "active",
+            "created": _instant(row.get("creation")),
+            "paymentDate": row.get("payment_date"),
+            "paymentAmount": {"value": row.get("amount_paid")},
+            "paymentIdentifier": {"value": row["payment_reference"]} if row.get("payment_reference") else None,
+            "request": _ref("Encounter", row.get("patient_encounter")),
+            "extension": [{"url": "mode_of_payment", "valueString": row["mode_of_payment"]}]
+            if row.get("mode_of_payment")
+            else [],
+        }
+    )
+
+
+FHIR_MAPPERS = {
+    "Patient": patient_to_fhir,
+    "Make Appointment": appointment_to_fhir,
+    "Patient Encounter": encounter_to_fhir,
+    "Encounter Payment": payment_to_fhir,
+}
+
+
+def stream_flat(doctype, since, until):
+    """
+    Rows straight off an unbuffered (server-side) cursor; nothing is materialised.
+    Archived rows follow the hot ones, each table read in its own index order.
+    """
+    conditions, values = "modified <= %(until)s", {"until": until, "since": since}
+    if since:
+        conditions += " AND modified > %(since)s"
+
+    for table in get_tables(doctype):
+        with frappe.db.unbuffered_cursor():
+            yield from frappe.db.sql(
+                f"SELECT * FROM `{table}` WHERE {conditions} ORDER BY modified, name",
+                values,
+                as_dict=True,
+                as_iterator=True,
+            )
+
+
+def stream_with_children(doctype, child_tables, since, until):
+    """
+    Keyset pages on (modified, name) with each page's child rows fetched in one
+    query per child table. An open unbuffered cursor would block those queries.
+    The hot table is paged first, then the archive table.
+    """
+    for table in get_tables(doctype):
+        last_modified, last_name = None, None
+        while True:
+            conditions = "modified <= %(until)s"
+            if last_name is not None:
+                conditions += (
+                    " AND (modified > %(last_modified)s OR (modified = %(last_modified)s AND name > %(last_name)s))"
+                )
+            elif since:
+                # Same bound as stream_flat: rows at the watermark went out with the previous run.
+                conditions += " AND modified > %(since)s"
+            rows = frappe.db.sql(
+                f"""
+                SELECT * FROM `{table}`
+                WHERE {conditions}
+                ORDER BY modified, name
+                LIMIT {KEYSET_BATCH_SIZE}
+                """,
+                {"until": until, "since": since, "last_modified": last_modified, "last_name": last_name},
+                as_dict=True,
+            )
+            if not rows:
+                break
+
+            children = get_child_rows(doctype, [r.name for r in rows], child_tables)
+            for row in rows:
+                row.update(children[row.name])
+                yield row
+
+            last_modified, last_name = rows[-1].modified, rows[-1].name
+
+
+def stream_doctype(doctype, since, until):
+    child_tables = EXPORT_DOCTYPES[doctype]
+    if child_tables:
+        return stream_with_children(doctype, child_tables, since, until)
+    return stream_flat(doctype, since, until)
+
+
+def write_ndjson(path, rows, mapper=None):
+    """Writes rows as gzipped NDJSON in chunks; returns the number of lines written."""
+    count = 0
+    buffer = []
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+        for row in rows:
+            buffer.append(json.dumps(mapper(row) if mapper else row, default=str, separators=(",", ":")))
+            if len(buffer) >= WRITE_CHUNK_ROWS:
+                f.write("\n".join(buffer) + "\n")
+                count += len(buffer)
+                buffer = []
+        if buffer:
+            f.write("\n".join(buffer) + "\n")
+            count += len(buffer)
+    return count
+
+
+def get_watermark(doctype):
+    return frappe.defaults.get_global_default(WATERMARK_KEY.format(doctype))
+
+
+def set_watermark(doctype, value):
+    frappe.defaults.set_global_default(WATERMARK_KEY.format(doctype), str(value))
+
+
+def export_bulk(doctypes=None, fhir=False, incremental=False, since=None, output_dir=None, echo=None):
+    """
+    Streams each doctype to `<output_dir>/<doctype>.ndjson.gz`. With `incremental`
+    only rows modified since the last run's watermark are exported, and the
+    watermark is advanced once the file is complete.
+    """
+    doctypes = doctypes or list(EXPORT_DOCTYPES)
+    if isinstance(doctypes, str):
+        doctypes = [d.strip() for d in doctypes.split(",") if d.strip()]
+    unknown = set(doctypes) - set(EXPORT_DOCTYPES)
+    if unknown:
+        frappe.throw(f"Cannot export: {', '.join(sorted(unknown))}")
+
+    echo = echo or (lambda message: None)
+    until = now_datetime()
+    output_dir = output_dir or frappe.get_site_path(
+        "private", "exports", until.strftime("%Y%m%d-%H%M%S") + ("-fhir" if fhir else "")
+    )
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = {"until": str(until), "format": "fhir" if cint(fhir) else "ndjson", "files": []}
+    for doctype in doctypes:
+        doctype_since = since or (get_watermark(doctype) if cint(incremental) else None)
+        path = os.path.join(output_dir, frappe.scrub(doctype) + ".ndjson.gz")
+
+        started = time.monotonic()
+        count = write_ndjson(
+            path, stream_doctype(doctype, doctype_since, until), FHIR_MAPPERS[doctype] if cint(fhir) else None
+        )
+        elapsed = time.monotonic() - started
+
+        if cint(incremental):
+            set_watermark(doctype, until)
+            frappe.db.commit()
+
+        manifest["files"].append(
+            {"doctype": doctype, "path": path, "rows": count, "since": doctype_since and str(doctype_since)}
+        )
+        echo(f"{doctype}: {count} rows in {elapsed:.1f}s -> {path}")
+
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+    return manifest
+
+
+@frappe.whitelist()
+def enqueue_bulk_export(doctypes=None, fhir=0, incremental=0):
+    frappe.only_for("System Manager")
+    frappe.enqueue(
+        "medinova.bulk_export.export_bulk",
+        queue="long",
+        timeout=6 * 60 * 60,
+        doctypes=doctypes,
+        fhir=cint(fhir),
+        incremental=cint(incremental),
+    )
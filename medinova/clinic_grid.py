@@ -0,0 +1,160 @@
+import frappe
+import numpy as np
+from frappe.utils import cint, get_time, getdate
+
+SLOT_MINUTES = 15
+
+STATE_CLOSED = 0
+STATE_FREE = 1
+STATE_BOOKED = 2
+STATE_OVER_CAPACITY = 3
+STATE_LABELS = ["closed", "free", "booked", "over_capacity"]
+
+
+def to_minutes(value):
+    """Minutes since midnight for a Time column value (timedelta, time or string)."""
+    t = get_time(value)
+    return t.hour * 60 + t.minute
+
+
+def get_day_schedules(date):
+    return frappe.db.sql(
+        """
+        SELECT
+            prac.name AS practitioner, prac.full_name,
+            sched.start_time, sched.end_time, sched.max_parallel_appointments
+        FROM `tabPractitioner Schedule` AS sched
+        INNER JOIN `tabPractitioner` AS prac ON prac.name = sched.parent
+        WHERE sched.parenttype = 'Practitioner'
+            AND sched.parentfield = 'availability_schedule'
+            AND sched.day_of_week = %s
+            AND sched.start_time IS NOT NULL AND sched.end_time IS NOT NULL
+        """,
+        date.strftime("%A"),
+        as_dict=True,
+    )
+
+
+def get_day_bookings(date):
+    return frappe.db.sql(
+        """
+        SELECT practitioner, start_time, end_time
+        FROM `tabMake Appointment`
+        WHERE appointment_date = %s
+            AND status != 'Cancelled'
+            AND practitioner IS NOT NULL
+            AND start_time IS NOT NULL AND end_time IS NOT NULL
+        """,
+        date,
+        as_dict=True,
+    )
+
+
+def interval_matrix(rows, starts, ends, weights, num_rows, num_slots):
+    """
+    Sums weighted [start, end) slot intervals into a rows x slots matrix using a
+    difference array and one cumulative sum, without a Python loop over slots.
+    """
+    diff = np.zeros((num_rows, num_slots + 1), dtype=np.int32)
+    np.add.at(diff, (rows, starts), weights)
+    np.add.at(diff, (rows, ends), -weights)
+    return np.cumsum(diff[:, :-1], axis=1)
+
+
+def build_grid(schedules, bookings, slot_minutes=SLOT_MINUTES):
+    names = {}
+    for row in schedules:
+        names.setdefault(row.practitioner, row.full_name)
+    for row in bookings:
+        names.setdefault(row.practitioner, None)
+
+    practitioners = sorted(names)
+    index = {name: i for i, name in enumerate(practitioners)}
+
+    sched_rows = np.array([index[r.practitioner] for r in schedules], dtype=np.int32)
+    sched_start = np.array([to_minutes(r.start_time) for r in schedules], dtype=np.int32)
+    sched_end = np.array([to_minutes(r.end_time) for r in schedules], dtype=np.int32)
+    sched_cap = np.array([max(cint(r.max_parallel_appointments), 1) for r in schedules], dtype=np.int32)
+
+    book_rows = np.array([index[r.practitioner] for r in bookings], dtype=np.int32)
+    book_start = np.array([to_minutes(r.start_time) for r in bookings], dtype=np.int32)
+    book_end = np.array([to_minutes(r.end_time) for r in bookings], dtype=np.int32)
+
+    all_starts = np.concatenate([sched_start, book_start])
+    all_ends = np.concatenate([sched_end, book_end])
+    if not len(all_starts):
+        return practitioners, names, 0, np.zeros((0, 0), dtype=np.int32), np.zeros((0, 0), dtype=np.int32)
+
+    day_start = (all_starts.min() // slot_minutes) * slot_minutes
+    num_slots = int(-(-(all_ends.max() - day_start) // slot_minutes))
+
+    # Capacity counts only slots a schedule fully covers; a booking occupies every slot it touches.
+    # A window shorter than a slot would end before it starts, so the end index is clamped to the
+    # start and the window adds nothing instead of a negative run.
+    sched_first = np.clip(-(-(sched_start - day_start) // slot_minutes), 0, num_slots)
+    sched_last = np.clip((sched_end - day_start) // slot_minutes, sched_first, num_slots)
+    book_first = np.clip((book_start - day_start) // slot_minutes, 0, num_slots)
+    book_last = np.clip(-(-(book_end - day_start) // slot_minutes), book_first, num_slots)
+
+    capacity = interval_matrix(sched_rows, sched_first, sched_last, sched_cap, len(practitioners), num_slots)
+    occupancy = interval_matrix(
+        book_rows, book_first, book_last, np.ones(len(bookings), dtype=np.int32), len(practitioners), num_slots
+    )
+
+    return practitioners, names, int(day_start), capacity, occupancy
+
+
+def grid_states(capacity, occupancy):
+    return np.select(
+        [
+            occupancy > capacity,
+            capacity == 0,
+            occupancy == capacity,
+        ],
+        [STATE_OVER_CAPACITY, STATE_CLOSED, STATE_BOOKED],
+        default=STATE_FREE,
+    ).astype(np.int8)
+
+
+@frappe.whitelist()
+def get_clinic_day_grid(appointment_date, slot_minutes=SLOT_MINUTES):
+    """
+    Front-desk grid for one day: every practitioner x slot with its state,
+    occupancy and capacity, plus utilisation per practitioner. Schedules and
+    bookings are read in two queries; the grid is computed as NumPy matrices.
+    """
+    frappe.has_permission("Make Appointment", "read", throw=True)
+
+    date = getdate(appointment_date)
+    slot_minutes = cint(slot_minutes) or SLOT_MINUTES
+
+    practitioners, names, day_start, capacity, occupancy = build_grid(
+        get_day_schedules(date), get_day_bookings(date), slot_minutes
+    )
+    states = grid_states(capacity, occupancy)
+
+    total_capacity = capacity.sum(axis=1)
+    used_capacity = np.minimum(occupancy, capacity).sum(axis=1)
+    utilisation = np.divide(
+        used_capacity, total_capacity, out=np.zeros(len(practitioners)), where=total_capacity > 0
+    )
+
+    slot_starts = day_start + slot_minutes * np.arange(capacity.shape[1])
+
+    return {
+        "date": str(date),
+        "slot_minutes": slot_minutes,
+        "slots": [f"{m // 60:02d}:{m % 60:02d}" for m in slot_starts.tolist()],
+        "state_labels": STATE_LABELS,
+        "practitioners": [
+            {
+                "practitioner": name,
+                "full_name": names[name],
+                "states": states[i].tolist(),
+                "occupancy": occupancy[i].tolist(),
+                "capacity": capacity[i].tolist(),
+                "utilisation": round(float(utilisation[i]), 4),
+            }
+            for i, name in enumerate(practitioners)
+        ],
+    }
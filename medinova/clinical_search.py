@@ -0,0 +1,291 @@
+import math
+import re
+from collections import Counter
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+from medinova.archive import get_all_with_archive, get_permitted_archived
+
+INDEXED_FIELDS = ("chief_complaint", "clinical_notes", "ai_summary")
+DOC_TERM = "__doc__"
+STATS_CACHE_KEY = "medinova:encounter_search_stats"
+STATS_TTL_SECS = 600
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_LIMIT = 20
+SNIPPET_CHARS = 80
+
+# Shorthand seen in rushed notes, expanded at index and query time so "r/o" finds "rule out" and back.
+ABBREVIATIONS = {
+    "abd": "abdominal",
+    "afib": "atrial fibrillation",
+    "bp": "blood pressure",
+    "c/o": "complains of",
+    "cad": "coronary artery disease",
+    "copd": "chronic obstructive pulmonary disease",
+    "cp": "chest pain",
+    "dm": "diabetes mellitus",
+    "dx": "diagnosis",
+    "f/u": "follow up",
+    "fx": "fracture",
+    "h/o": "history of",
+    "ha": "headache",
+    "htn": "hypertension",
+    "hx": "history",
+    "mi": "myocardial infarction",
+    "morn": "morning",
+    "n/v": "nausea vomiting",
+    "pt": "patient",
+    "r/o": "rule out",
+    "rx": "prescription",
+    "s/p": "status post",
+    "sob": "shortness of breath",
+    "sx": "symptoms",
+    "tx": "treatment",
+    "uri": "upper respiratory infection",
+    "uti": "urinary tract infection",
+    "w/": "with",
+    "w/o": "without",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in", "is",
+    "it", "of", "on", "or", "since", "that", "the", "to", "was", "were", "with",
+}
+
+TOKEN = re.compile(r"[a-z0-9]+(?:/[a-z0-9]*)*")
+
+
+def stem(word):
+    """Light plural stemming; clinical vocabulary breaks aggressive stemmers."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """
+    Lowercases, keeps slash shorthand (c/o, r/o, n/v) as single tokens, and adds
+    the expanded words of known abbreviations alongside the original token.
+    """
+    terms = []
+    for raw in TOKEN.findall((text or "").lower()):
+        expansion = ABBREVIATIONS.get(raw)
+        if "/" in raw or expansion:
+            terms.append(raw)
+        if expansion:
+            terms += [stem(w) for w in expansion.split() if w not in STOPWORDS]
+        elif "/" in raw:
+            terms += [stem(w) for w in raw.split("/") if w and w not in STOPWORDS]
+        elif raw not in STOPWORDS:
+            terms.append(stem(raw))
+    return [t for t in terms if len(t) <= 140]
+
+
+def get_encounter_text(encounter):
+    return " ".join(encounter.get(field) or "" for field in INDEXED_FIELDS)
+
+
+def build_postings(encounter):
+    terms = tokenize(get_encounter_text(encounter))
+    if not terms:
+        return []
+
+    length = len(terms)
+    postings = [(term, tf, length) for term, tf in Counter(terms).items()]
+    postings.append((DOC_TERM, 0, length))
+    return postings
+
+
+def insert_postings(encounters):
+    now = now_datetime()
+    user = frappe.session.user
+    values = [
+        (
+            frappe.generate_hash(length=12), now, now, user, user,
+            term, e.get("name"), e.get("patient"), e.get("practitioner"), tf, length,
+        )
+        for e in encounters
+        for term, tf, length in build_postings(e)
+    ]
+    if values:
+        frappe.db.bulk_insert(
+            "Encounter Search Posting",
+            fields=[
+                "name", "creation", "modified", "owner", "modified_by",
+                "term", "encounter", "patient", "practitioner", "term_frequency", "doc_length",
+            ],
+            values=values,
+        )
+
+
+def index_encounter(doc, force=False):
+    """Reindexes one encounter when any searchable text (or its patient) changed."""
+    if not force and not doc.is_new():
+        changed = [f for f in (*INDEXED_FIELDS, "patient", "practitioner") if doc.has_value_changed(f)]
+        if not changed:
+            return
+
+    frappe.db.delete("Encounter Search Posting", {"encounter": doc.name})
+    insert_postings([doc.as_dict()])
+
+
+def remove_encounter(doc):
+    frappe.db.delete("Encounter Search Posting", {"encounter": doc.name})
+
+
+def rebuild_encounter_search_index(batch_size=500):
+    """Background job: (re)indexes every encounter in keyset batches."""
+    frappe.db.delete("Encounter Search Posting")
+    last_name = ""
+    while True:
+        encounters = frappe.get_all(
+            "Patient Encounter",
+            filters={"name": (">", last_name)},
+            fields=["name", "patient", "practitioner", *INDEXED_FIELDS],
+            order_by="name asc",
+            limit=batch_size,
+        )
+        if not encounters:
+            break
+        insert_postings(encounters)
+        frappe.db.commit()
+        last_name = encounters[-1].name
+    frappe.cache.delete_value(STATS_CACHE_KEY)
+
+
+def get_collection_stats():
+    """Document count and average length, read off the per-encounter sentinel postings."""
+    stats = frappe.cache.get_value(STATS_CACHE_KEY)
+    if stats:
+        return stats
+
+    count, avg_length = frappe.db.sql(
+        "SELECT COUNT(*), AVG(doc_length) FROM `tabEncounter Search Posting` WHERE term = %s",
+        DOC_TERM,
+    )[0]
+    stats = {"count": cint(count), "avg_length": float(avg_length or 1)}
+    frappe.cache.set_value(STATS_CACHE_KEY, stats, expires_in_sec=STATS_TTL_SECS)
+    return stats
+
+
+def get_document_frequencies(terms):
+    return dict(
+        frappe.db.sql(
+            """
+            SELECT term, COUNT(*)
+            FROM `tabEncounter Search Posting`
+            WHERE term IN %s
+            GROUP BY term
+            """,
+            (tuple(terms),),
+        )
+    )
+
+
+def rank(terms, patient=None, limit=DEFAULT_LIMIT):
+    """BM25 over the postings of the query terms, summed per encounter in SQL."""
+    stats = get_collection_stats()
+    frequencies = get_document_frequencies(terms)
+    terms = [t for t in terms if frequencies.get(t)]
+    if not terms or not stats["count"]:
+        return []
+
+    idf_cases = " ".join(
+        "WHEN {} THEN {:.6f}".format(
+            frappe.db.escape(term),
+            math.log(1 + (stats["count"] - frequencies[term] + 0.5) / (frequencies[term] + 0.5)),
+        )
+        for term in terms
+    )
+    patient_condition = "AND patient = %(patient)s" if patient else ""
+
+    return frappe.db.sql(
+        f"""
+        SELECT
+            encounter,
+            SUM(
+                (CASE term {idf_cases} ELSE 0 END)
+                * term_frequency * {BM25_K1 + 1}
+                / (term_frequency + {BM25_K1} * (1 - {BM25_B} + {BM25_B} * doc_length / %(avg_length)s))
+            ) AS score
+        FROM `tabEncounter Search Posting`
+        WHERE term IN %(terms)s {patient_condition}
+        GROUP BY encounter
+        ORDER BY score DESC
+        LIMIT %(limit)s
+        """,
+        {"terms": tuple(terms), "avg_length": stats["avg_length"], "patient": patient, "limit": limit},
+        as_dict=True,
+    )
+
+
+def make_snippet(text, words):
+    lowered = text.lower()
+    positions = [lowered.find(w) for w in words if w and lowered.find(w) >= 0]
+    if not positions:
+        return text[: SNIPPET_CHARS * 2]
+    start = max(min(positions) - SNIPPET_CHARS, 0)
+    snippet = text[start : start + SNIPPET_CHARS * 2]
+    return ("…" if start else "") + snippet + ("…" if start + SNIPPET_CHARS * 2 < len(text) else "")
+
+
+@frappe.whitelist()
+def search_clinical_notes(query, patient=None, start=0, limit=DEFAULT_LIMIT):
+    """
+    Ranked search over chief complaint, clinical notes and AI summary, across
+    one patient or the whole practice. Results are limited to encounters the
+    user may read. Postings of archived encounters stay indexed, so they are
+    found (and counted in the BM25 statistics) like hot ones.
+    """
+    frappe.has_permission("Patient Encounter", "read", throw=True)
+
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    start, limit = max(cint(start), 0), min(max(cint(limit), 1), 100)
+    # Over-fetch so permission filtering still leaves a full page.
+    ranked = rank(terms, patient=patient, limit=(start + limit) * 3)
+
+    names = [r.encounter for r in ranked]
+    readable = set(
+        frappe.get_list(
+            "Patient Encounter",
+            filters={"name": ("in", names or [""])},
+            pluck="name",
+            limit_page_length=0,
+        )
+    )
+    readable.update(get_permitted_archived("Patient Encounter", [n for n in names if n not in readable]))
+    page = [r for r in ranked if r.encounter in readable][start : start + limit]
+    if not page:
+        return []
+
+    details = {
+        e.name: e
+        for e in get_all_with_archive(
+            "Patient Encounter",
+            filters={"name": ("in", [r.encounter for r in page])},
+            fields=["name", "patient", "practitioner", "encounter_datetime", *INDEXED_FIELDS],
+        )
+    }
+
+    words = [w for w in (query or "").lower().split() if w not in STOPWORDS]
+    results = []
+    for row in page:
+        encounter = details[row.encounter]
+        results.append(
+            {
+                "encounter": encounter.name,
+                "patient": encounter.patient,
+                "practitioner": encounter.practitioner,
+                "encounter_datetime": encounter.encounter_datetime,
+                "score": round(row.score, 4),
+                "snippet": make_snippet(get_encounter_text(encounter), words),
+            }
+        )
+    return results
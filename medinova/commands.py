@@ -0,0 +1,68 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("backfill-ai-summaries")
+@click.option("--provider", default="gemini", help="gemini, mock, or a dotted path to a SummaryProvider")
+@click.option("--batch-size", default=50, type=int, help="Encounters fetched and written per batch")
+@click.option("--concurrency", default=4, type=int, help="Provider requests in flight at once")
+@click.option("--requests-per-minute", default=60, type=int, help="Upper bound on provider requests")
+@click.option("--limit", default=0, type=int, help="Stop after this many encounters (0 = all)")
+@click.option("--reset", is_flag=True, default=False, help="Ignore the checkpoint and start from the beginning")
+@pass_context
+def backfill_ai_summaries(context, provider, batch_size, concurrency, requests_per_minute, limit, reset):
+	"""Summarise encounters that have clinical notes but no AI summary, resumably."""
+	import frappe
+
+	from medinova.ai_backfill import backfill_ai_summaries as run_backfill
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		stats = run_backfill(
+			provider=provider,
+			batch_size=batch_size,
+			concurrency=concurrency,
+			requests_per_minute=requests_per_minute,
+			limit=limit,
+			reset=reset,
+			echo=click.echo,
+		)
+		click.echo(
+			f"Done: {stats['summarised']} summarised, {stats['failed']} failed in "
+			f"{stats['elapsed_secs']}s ({stats['per_sec']} encounters/s)"
+		)
+	finally:
+		frappe.destroy()
+
+
+@click.command("bulk-export")
+@click.option("--doctypes", default=None, help="Comma separated subset of Patient, Make Appointment, Patient Encounter, Encounter Payment")
+@click.option("--fhir", is_flag=True, default=False, help="Write FHIR R4 resources instead of raw rows")
+@click.option("--incremental", is_flag=True, default=False, help="Only rows modified since the last incremental export")
+@click.option("--since", default=None, help="Only rows modified after this datetime (overrides the stored watermark)")
+@click.option("--output-dir", default=None, help="Defaults to sites/<site>/private/exports/<timestamp>")
+@pass_context
+def bulk_export(context, doctypes, fhir, incremental, since, output_dir):
+	"""Stream patients, appointments, encounters and payments to gzipped NDJSON files."""
+	import frappe
+
+	from medinova.bulk_export import export_bulk
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		manifest = export_bulk(
+			doctypes=doctypes,
+			fhir=fhir,
+			incremental=incremental,
+			since=since,
+			output_dir=output_dir,
+			echo=click.echo,
+		)
+		click.echo(f"Done: {sum(f['rows'] for f in manifest['files'])} rows exported")
+	finally:
+		frappe.destroy()
+
+
+commands = [backfill_ai_summaries, bulk_export]
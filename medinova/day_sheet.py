@@ -0,0 +1,164 @@
+import frappe
+from frappe.utils import add_days, getdate, today
+
+from medinova.archive import archive_exists
+
+DAY_SHEET_TTL_SECS = 6 * 60 * 60
+
+
+def get_day_sheet_key(practitioner, appointment_date):
+    return f"medinova:day_sheet:{practitioner}:{getdate(appointment_date)}"
+
+
+def get_appointments(practitioner, appointment_date):
+    """The day's live appointments with the patient details a practitioner needs, in one join."""
+    return frappe.db.sql(
+        """
+        SELECT
+            app.name AS appointment, app.start_time, app.end_time, app.status,
+            app.appointment_type, app.payment_status, app.notes,
+            app.patient, pat.full_name AS patient_name, pat.contact_number, pat.email,
+            pat.date_of_birth, pat.gender, pat.allergies, pat.chronic_conditions,
+            pat.medical_history_summary
+        FROM `tabMake Appointment` AS app
+        LEFT JOIN `tabPatient` AS pat ON pat.name = app.patient
+        WHERE app.practitioner = %s AND app.appointment_date = %s AND app.status != 'Cancelled'
+        ORDER BY app.start_time, app.name
+        """,
+        (practitioner, appointment_date),
+        as_dict=True,
+    )
+
+
+def get_latest_encounters(patients, before, table="tabPatient Encounter"):
+    """
+    Each patient's most recent encounter before `before`: a grouped MAX on the
+    (patient, encounter_datetime) index, joined back for the summary.
+    """
+    if not patients:
+        return {}
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT enc.patient, enc.name AS encounter, enc.encounter_datetime, enc.chief_complaint, enc.ai_summary
+        FROM `{table}` AS enc
+        INNER JOIN (
+            SELECT patient, MAX(encounter_datetime) AS latest
+            FROM `{table}`
+            WHERE patient IN %(patients)s AND encounter_datetime < %(before)s
+            GROUP BY patient
+        ) AS last ON last.patient = enc.patient AND last.latest = enc.encounter_datetime
+        ORDER BY enc.name DESC
+        """,
+        {"patients": tuple(patients), "before": before},
+        as_dict=True,
+    )
+    latest = {}
+    for row in rows:
+        latest.setdefault(row.pop("patient"), row)
+    return latest
+
+
+def build_day_sheet(practitioner, appointment_date):
+    appointment_date = getdate(appointment_date)
+    appointments = get_appointments(practitioner, appointment_date)
+
+    patients = list({a.patient for a in appointments if a.patient})
+    before = add_days(appointment_date, 1)
+    latest = get_latest_encounters(patients, before)
+    # Patients not seen for longer than the archive horizon only have archived encounters.
+    missing = [p for p in patients if p not in latest]
+    if missing and archive_exists("Patient Encounter"):
+        latest.update(get_latest_encounters(missing, before, "tabPatient Encounter Archive"))
+
+    for appointment in appointments:
+        appointment["last_encounter"] = latest.get(appointment.patient)
+
+    return {
+        "practitioner": practitioner,
+        "appointment_date": str(appointment_date),
+        "appointments": appointments,
+    }
+
+
+@frappe.whitelist()
+def get_day_sheet(practitioner, appointment_date=None):
+    """
+    The practitioner's worklist for a day: each appointment with patient
+    contact, allergies, chronic conditions and the last encounter summary.
+    Built in at most three queries and cached per practitioner-day.
+    """
+    frappe.has_permission("Make Appointment", "read", throw=True)
+    frappe.has_permission("Patient", "read", throw=True)
+
+    appointment_date = getdate(appointment_date or today())
+    key = get_day_sheet_key(practitioner, appointment_date)
+    sheet = frappe.cache.get_value(key)
+    if sheet is None:
+        sheet = build_day_sheet(practitioner, appointment_date)
+        frappe.cache.set_value(key, sheet, expires_in_sec=DAY_SHEET_TTL_SECS)
+    return sheet
+
+
+def invalidate_day_sheets(keys):
+    """Dropped now and again after commit, so a sheet built mid-transaction is not kept."""
+    keys = {get_day_sheet_key(p, d) for p, d in keys if p and d}
+    if not keys:
+        return
+
+    def clear():
+        for key in keys:
+            frappe.cache.delete_value(key)
+
+    clear()
+    frappe.db.after_commit.add(clear)
+
+
+def invalidate_patient_day_sheets(patients):
+    """Sheets from today on that list any of these patients."""
+    patients = [p for p in patients if p]
+    if not patients:
+        return
+    invalidate_day_sheets(
+        frappe.get_all(
+            "Make Appointment",
+            filters={"patient": ("in", patients), "appointment_date": (">=", today())},
+            fields=["practitioner", "appointment_date"],
+            distinct=True,
+            as_list=True,
+        )
+    )
+
+
+def clear_appointment_day_sheets(doc, method=None):
+    before = doc.get_doc_before_save()
+    keys = [(doc.practitioner, doc.appointment_date)]
+    if before:
+        keys.append((before.practitioner, before.appointment_date))
+    invalidate_day_sheets(keys)
+
+
+def clear_patient_day_sheets(doc, method=None):
+    invalidate_patient_day_sheets([doc.name])
+
+
+def clear_encounter_day_sheets(doc, method=None):
+    before = doc.get_doc_before_save()
+    invalidate_patient_day_sheets([doc.patient, before and before.patient])
+
+
+def warm_day_sheets():
+    """Builds today's sheets before clinic opens so the first open is a cache hit."""
+    date = getdate(today())
+    practitioners = frappe.get_all(
+        "Make Appointment",
+        filters={"appointment_date": date, "status": ("!=", "Cancelled")},
+        pluck="practitioner",
+        distinct=True,
+    )
+    for practitioner in filter(None, practitioners):
+        frappe.cache.set_value(
+            get_day_sheet_key(practitioner, date),
+            build_day_sheet(practitioner, date),
+            expires_in_sec=DAY_SHEET_TTL_SECS,
+        )
@@ -10,11 +10,26 @@ override_whitelisted_methods = {
 }
 scheduler_events = {
     "cron": {
-        "*/5 * * * *": [
-            "medinova.api.auto_free_slots"
+        "* * * * *": [
+            "medinova.waitlist.expire_waitlist_offers"
+        ],
+        "0 7 * * *": [
+            "medinova.day_sheet.warm_day_sheets"
+        ],
+        "0 * * * *": [
+            "medinova.reminders.dispatch_reminders"
         ]
-    }
+    },
+    "daily_long": [
+        "medinova.archive.archive_closed_records"
+    ]
 }
+standard_queries = {
+    "Patient": "medinova.patient_search.patient_query"
+}
+portal_menu_items = [
+    {"title": "My Appointments", "route": "/my-appointments"}
+]
 
 
 
@@ -40,10 +55,12 @@ scheduler_events = {
 # include js, css files in header of desk.html
 # app_include_css = "/assets/medinova/css/medinova.css"
 # app_include_js = "/assets/medinova/js/medinova.js"
+app_include_js = "/assets/medinova/js/slot_updates.js"
 
 # include js, css files in header of web template
 # web_include_css = "/assets/medinova/css/medinova.css"
 # web_include_js = "/assets/medinova/js/medinova.js"
+web_include_js = "/assets/medinova/js/slot_updates.js"
 
 # include custom scss in every website theme (without file extension ".scss")
 # website_theme_scss = "medinova/public/scss/website"
@@ -0,0 +1,7 @@
+"""
+Concurrent load test for the booking path, driven over HTTP against a running bench.
+
+    python -m medinova.load_test medinova/load_test/scenarios/morning_rush.json
+"""
+
+from medinova.load_test.runner import load_scenario, run_scenario
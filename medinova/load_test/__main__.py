@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import sys
+
+from medinova.load_test.runner import format_report, load_scenario, run_scenario
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m medinova.load_test",
+        description="Drive the booking APIs of a running bench concurrently and report latency, errors and double bookings.",
+    )
+    parser.add_argument("scenario", help="Scenario JSON file (see medinova/load_test/scenarios)")
+    parser.add_argument("--base-url", help="Site URL, e.g. http://clinic.localhost:8000")
+    parser.add_argument("--user", help="Login user (password from MEDINOVA_LOAD_TEST_PASSWORD)")
+    parser.add_argument("--users", type=int, help="Concurrent simulated users")
+    parser.add_argument("--duration", type=int, dest="duration_secs", help="Stop after this many seconds")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests in total")
+    parser.add_argument("--seed", type=int, help="Replay the same request sequence across runs")
+    parser.add_argument("--output", help="Write the JSON report here, to compare later runs against")
+    parser.add_argument("--compare", help="A previous JSON report to show throughput and latency deltas against")
+    parser.add_argument("--no-cleanup", action="store_true", help="Keep the appointments created by the run")
+    args = parser.parse_args(argv)
+
+    overrides = {
+        "base_url": args.base_url,
+        "users": args.users,
+        "duration_secs": args.duration_secs,
+        "requests": args.requests,
+        "seed": args.seed,
+        "cleanup": False if args.no_cleanup else None,
+    }
+    scenario = load_scenario(args.scenario, overrides)
+    if args.user or os.environ.get("MEDINOVA_LOAD_TEST_PASSWORD"):
+        scenario["auth"] = {
+            "usr": args.user or scenario["auth"].get("usr"),
+            "pwd": os.environ.get("MEDINOVA_LOAD_TEST_PASSWORD") or scenario["auth"].get("pwd"),
+        }
+    if os.environ.get("MEDINOVA_LOAD_TEST_API_KEY"):
+        scenario["auth"] = {
+            "api_key": os.environ["MEDINOVA_LOAD_TEST_API_KEY"],
+            "api_secret": os.environ.get("MEDINOVA_LOAD_TEST_API_SECRET"),
+        }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = run_scenario(scenario)
+    print(format_report(report, baseline))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+
+    # Non-zero exit lets CI fail a release that double-books.
+    return 1 if report["double_bookings"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import json
+import time
+
+import requests
+
+SLOTS_METHOD = "medinova.api.get_available_start_times"
+WEB_FORM_SLOTS_METHOD = "medinova.medinova.web_form.new_appointment.new_appointment.get_available_slots"
+CHAT_BOOKING_METHOD = "medinova.api.create_appointment_from_chat"
+
+
+class Result:
+    __slots__ = ("appointment", "error", "latency", "operation", "outcome", "started")
+
+    def __init__(self, operation, started, latency, outcome, error=None, appointment=None):
+        self.operation = operation
+        self.started = started
+        self.latency = latency
+        self.outcome = outcome
+        self.error = error
+        self.appointment = appointment
+
+
+class BenchClient:
+    """One simulated user: its own HTTP session (cookies, keep-alive) against the site."""
+
+    def __init__(self, base_url, auth, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        if auth.get("api_key"):
+            self.session.headers["Authorization"] = f"token {auth['api_key']}:{auth['api_secret']}"
+        else:
+            self.login(auth["usr"], auth["pwd"])
+
+    def login(self, usr, pwd):
+        response = self.session.post(
+            f"{self.base_url}/api/method/login", data={"usr": usr, "pwd": pwd}, timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def request(self, operation, method, path, **kwargs):
+        """Times one call; returns (Result, parsed body or None)."""
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            return Result(operation, started, time.monotonic() - started, "error", type(e).__name__), None
+
+        latency = time.monotonic() - started
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+
+        if response.status_code == 200:
+            return Result(operation, started, latency, "ok"), body
+        # 417 is frappe.ValidationError: an overlap or availability rejection, expected under contention.
+        outcome = "rejected" if response.status_code == 417 else "error"
+        return Result(operation, started, latency, outcome, f"HTTP {response.status_code}"), body
+
+    def call(self, operation, method, **params):
+        result, body = self.request(operation, "POST", f"/api/method/{method}", data=params)
+        return result, (body or {}).get("message")
+
+    def get_list(self, doctype, filters, fields, limit=0):
+        response = self.session.get(
+            f"{self.base_url}/api/resource/{doctype}",
+            params={
+                "filters": json.dumps(filters),
+                "fields": json.dumps(fields),
+                "limit_page_length": limit,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()["data"]
+
+    def get_doc(self, doctype, name):
+        response = self.session.get(f"{self.base_url}/api/resource/{doctype}/{name}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["data"]
+
+    def delete(self, doctype, name):
+        self.session.delete(f"{self.base_url}/api/resource/{doctype}/{name}", timeout=self.timeout)
+
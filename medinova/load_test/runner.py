@@ -0,0 +1,325 @@
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from medinova.load_test.client import (
+    CHAT_BOOKING_METHOD,
+    SLOTS_METHOD,
+    WEB_FORM_SLOTS_METHOD,
+    BenchClient,
+)
+
+OPERATIONS = ("get_available_start_times", "get_available_slots", "create_appointment_from_chat", "insert_appointment")
+
+DEFAULTS = {
+    "base_url": "http://localhost:8000",
+    "auth": {"usr": "Administrator", "pwd": "admin"},
+    "users": 20,
+    "duration_secs": 60,
+    "requests": 0,
+    "ramp_up_secs": 0,
+    "think_time_ms": [0, 0],
+    "slot_choice": "first",
+    "timeout_secs": 30,
+    "mix": {"get_available_start_times": 1},
+    "cleanup": True,
+    "seed": None,
+}
+
+
+def load_scenario(path, overrides=None):
+    with open(path) as f:
+        scenario = {**DEFAULTS, **json.load(f)}
+    scenario.update({k: v for k, v in (overrides or {}).items() if v is not None})
+
+    unknown = set(scenario["mix"]) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+    for key in ("practitioners", "appointment_types", "dates"):
+        if not scenario.get("targets", {}).get(key):
+            raise ValueError(f"Scenario needs targets.{key}")
+
+    scenario.setdefault("name", path.rsplit("/", 1)[-1].rsplit(".", 1)[0])
+    scenario["targets"]["dates"] = [resolve_date(d) for d in scenario["targets"]["dates"]]
+    return scenario
+
+
+def resolve_date(value):
+    """'+1' is tomorrow, '+0' today; anything else is taken as an ISO date."""
+    value = str(value)
+    if value[:1] in "+-" and value[1:].isdigit():
+        return str(date.today() + timedelta(days=int(value)))
+    return value
+
+
+class Workload:
+    """Per-user random choices, seeded so that a scenario replays the same request sequence."""
+
+    def __init__(self, scenario, seed):
+        self.targets = scenario["targets"]
+        self.slot_choice = scenario["slot_choice"]
+        self.rng = random.Random(seed)
+        self.operations = list(scenario["mix"])
+        self.weights = [scenario["mix"][op] for op in self.operations]
+
+    def next_operation(self):
+        return self.rng.choices(self.operations, self.weights)[0]
+
+    def slot_key(self):
+        return {
+            "practitioner": self.rng.choice(self.targets["practitioners"]),
+            "appointment_date": self.rng.choice(self.targets["dates"]),
+            "appointment_type": self.rng.choice(self.targets["appointment_types"]),
+        }
+
+    def pick_slot(self, slots):
+        if not slots:
+            return None
+        return slots[0] if self.slot_choice == "first" else self.rng.choice(slots)
+
+    def pick(self, key):
+        values = self.targets.get(key)
+        return self.rng.choice(values) if values else None
+
+
+def book(client, workload, operation):
+    """Looks up free slots and books one of them, the way the portal and chat flows do."""
+    key = workload.slot_key()
+    lookup, message = client.call("get_available_start_times", SLOTS_METHOD, **key)
+    results = [lookup]
+    slot = workload.pick_slot((message or {}).get("available_slots") or [])
+    if not slot:
+        return results
+
+    if operation == "create_appointment_from_chat":
+        result, message = client.call(
+            operation,
+            CHAT_BOOKING_METHOD,
+            patient_name=workload.pick("patient_names") or "",
+            start_time=slot,
+            **key,
+        )
+        if result.outcome == "ok" and isinstance(message, dict):
+            if message.get("success"):
+                result.appointment = message.get("appointment_name")
+            else:
+                result.outcome, result.error = "rejected", (message.get("error") or "")[:120]
+    else:
+        doc = {
+            **key,
+            "patient": workload.pick("patients"),
+            "start_time": slot,
+            "status": "Booked",
+            "booking_channel": "Front-desk",
+        }
+        result, body = client.request(operation, "POST", "/api/resource/Make Appointment", json=doc)
+        if result.outcome == "ok":
+            result.appointment = ((body or {}).get("data") or {}).get("name")
+        elif body and body.get("exception"):
+            result.error = body["exception"].splitlines()[-1][:120]
+
+    results.append(result)
+    return results
+
+
+def run_user(index, scenario, stop_at, budget):
+    ramp = scenario["ramp_up_secs"] * index / max(scenario["users"], 1)
+    time.sleep(ramp)
+
+    seed = None if scenario["seed"] is None else scenario["seed"] + index
+    workload = Workload(scenario, seed)
+    client = BenchClient(scenario["base_url"], scenario["auth"], timeout=scenario["timeout_secs"])
+    think_min, think_max = scenario["think_time_ms"]
+
+    results = []
+    while time.monotonic() < stop_at and budget.take():
+        operation = workload.next_operation()
+        if operation == "get_available_start_times":
+            results.append(client.call(operation, SLOTS_METHOD, **workload.slot_key())[0])
+        elif operation == "get_available_slots":
+            results.append(client.call(operation, WEB_FORM_SLOTS_METHOD, **workload.slot_key())[0])
+        else:
+            results.extend(book(client, workload, operation))
+
+        if think_max:
+            time.sleep(workload.rng.uniform(think_min, think_max) / 1000)
+    return results
+
+
+class RequestBudget:
+    """Total request count shared by all user threads; unlimited when `total` is 0."""
+
+    def __init__(self, total):
+        self.remaining = total or None
+        self.lock = threading.Lock()
+
+    def take(self):
+        if self.remaining is None:
+            return True
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def summarise(results, elapsed):
+    by_operation = defaultdict(list)
+    for result in results:
+        by_operation[result.operation].append(result)
+
+    operations = {}
+    for operation, rows in sorted(by_operation.items()):
+        latencies = np.array([r.latency for r in rows]) * 1000
+        outcomes = Counter(r.outcome for r in rows)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        operations[operation] = {
+            "count": len(rows),
+            "ok": outcomes["ok"],
+            "rejected": outcomes["rejected"],
+            "errors": outcomes["error"],
+            "error_rate": round(outcomes["error"] / len(rows), 4),
+            "throughput_rps": round(len(rows) / elapsed, 2),
+            "p50_ms": round(float(p50), 1),
+            "p95_ms": round(float(p95), 1),
+            "p99_ms": round(float(p99), 1),
+            "max_ms": round(float(latencies.max()), 1),
+        }
+
+    errors = Counter(f"{r.operation}: {r.error}" for r in results if r.outcome != "ok" and r.error)
+    return {
+        "requests": len(results),
+        "elapsed_secs": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0,
+        "error_rate": round(sum(r.outcome == "error" for r in results) / len(results), 4) if results else 0,
+        "operations": operations,
+        "top_errors": errors.most_common(10),
+    }
+
+
+def to_minutes(value):
+    hours, minutes = str(value).split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def find_double_bookings(client, practitioners, dates):
+    """
+    Time points where a practitioner holds more live appointments than the
+    max_parallel_appointments of that day's schedule.
+    """
+    findings = []
+    for practitioner in practitioners:
+        schedule = client.get_doc("Practitioner", practitioner).get("availability_schedule") or []
+        for appointment_date in dates:
+            weekday = datetime.strptime(appointment_date, "%Y-%m-%d").strftime("%A")
+            capacity = max(
+                (int(s.get("max_parallel_appointments") or 1) for s in schedule if s.get("day_of_week") == weekday),
+                default=1,
+            )
+            appointments = client.get_list(
+                "Make Appointment",
+                filters=[
+                    ["practitioner", "=", practitioner],
+                    ["appointment_date", "=", appointment_date],
+                    ["status", "!=", "Cancelled"],
+                ],
+                fields=["name", "start_time", "end_time"],
+            )
+            spans = [
+                (to_minutes(a["start_time"]), to_minutes(a["end_time"]), a["name"])
+                for a in appointments
+                if a.get("start_time") and a.get("end_time")
+            ]
+            for start, _end, _name in sorted(spans):
+                overlapping = [name for s, e, name in spans if s <= start < e]
+                if len(overlapping) > capacity:
+                    findings.append(
+                        {
+                            "practitioner": practitioner,
+                            "date": appointment_date,
+                            "time": f"{start // 60:02d}:{start % 60:02d}",
+                            "capacity": capacity,
+                            "appointments": sorted(overlapping),
+                        }
+                    )
+
+    unique = {(f["practitioner"], f["date"], tuple(f["appointments"])): f for f in findings}
+    return list(unique.values())
+
+
+def run_scenario(scenario, echo=print):
+    echo(
+        f"Running '{scenario['name']}': {scenario['users']} users against {scenario['base_url']}"
+        f" for {scenario['requests'] or 'unlimited'} requests / {scenario['duration_secs']}s"
+    )
+    budget = RequestBudget(scenario["requests"])
+    started_at = datetime.now()
+    started = time.monotonic()
+    stop_at = started + scenario["duration_secs"] + scenario["ramp_up_secs"]
+
+    with ThreadPoolExecutor(max_workers=scenario["users"]) as pool:
+        futures = [pool.submit(run_user, i, scenario, stop_at, budget) for i in range(scenario["users"])]
+        results = [r for future in futures for r in future.result()]
+    elapsed = time.monotonic() - started
+
+    report = {"scenario": scenario["name"], "started_at": str(started_at), "users": scenario["users"]}
+    report.update(summarise(results, elapsed))
+
+    client = BenchClient(scenario["base_url"], scenario["auth"], timeout=scenario["timeout_secs"])
+    created = [r.appointment for r in results if r.appointment]
+    report["appointments_created"] = len(created)
+    report["double_bookings"] = find_double_bookings(
+        client, scenario["targets"]["practitioners"], scenario["targets"]["dates"]
+    )
+
+    if scenario["cleanup"]:
+        for name in created:
+            client.delete("Make Appointment", name)
+
+    return report
+
+
+def format_report(report, baseline=None):
+    lines = [
+        f"Scenario {report['scenario']} | {report['users']} users | {report['requests']} requests"
+        f" in {report['elapsed_secs']}s | {report['throughput_rps']} req/s | error rate {report['error_rate']:.2%}",
+        "",
+        f"{'operation':<30}{'count':>8}{'ok':>8}{'rejected':>10}{'errors':>8}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}",
+    ]
+    for operation, stats in report["operations"].items():
+        lines.append(
+            f"{operation:<30}{stats['count']:>8}{stats['ok']:>8}{stats['rejected']:>10}{stats['errors']:>8}"
+            f"{stats['throughput_rps']:>9}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+        )
+        previous = (baseline or {}).get("operations", {}).get(operation)
+        if previous:
+            lines.append(
+                f"{'  vs baseline':<30}{'':>34}{_delta(stats['throughput_rps'], previous['throughput_rps']):>9}"
+                f"{_delta(stats['p50_ms'], previous['p50_ms']):>9}{_delta(stats['p95_ms'], previous['p95_ms']):>9}"
+                f"{_delta(stats['p99_ms'], previous['p99_ms']):>9}"
+            )
+
+    lines += ["", f"Appointments created: {report['appointments_created']}"]
+    lines.append(f"Double bookings: {len(report['double_bookings'])}")
+    for finding in report["double_bookings"]:
+        lines.append(
+            f"  {finding['practitioner']} {finding['date']} {finding['time']}"
+            f" capacity {finding['capacity']}: {', '.join(finding['appointments'])}"
+        )
+    if report["top_errors"]:
+        lines += ["", "Top errors:"]
+        lines += [f"  {count:>6} x {error}" for error, count in report["top_errors"]]
+    return "\n".join(lines)
+
+
+def _delta(current, previous):
+    if not previous:
+        return "-"
+    return f"{(current - previous) / previous:+.0%}"
@@ -0,0 +1,23 @@
+// Copyright (c) 2025, chai and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Appointment Waitlist", {
+	refresh(frm) {
+		if (frm.doc.status !== "Offered") return;
+
+		frm.add_custom_button(__("Accept Offer"), () => {
+			frappe.call({
+				method: "medinova.waitlist.accept_waitlist_offer",
+				args: { waitlist_entry: frm.doc.name },
+				callback: () => frm.reload_doc(),
+			});
+		});
+		frm.add_custom_button(__("Decline Offer"), () => {
+			frappe.call({
+				method: "medinova.waitlist.decline_waitlist_offer",
+				args: { waitlist_entry: frm.doc.name },
+				callback: () => frm.reload_doc(),
+			});
+		});
+	},
+});
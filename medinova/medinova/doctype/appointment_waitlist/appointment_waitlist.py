@@ -0,0 +1,24 @@
+# Copyright (c) 2025, chai and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import getdate
+
+
+class AppointmentWaitlist(Document):
+	def validate(self):
+		if not (self.practitioner or self.specialization):
+			frappe.throw("Set either a Practitioner or a Specialization to wait for.")
+
+		if self.from_date and self.to_date and getdate(self.to_date) < getdate(self.from_date):
+			frappe.throw("To Date cannot be before From Date.")
+
+
+def on_doctype_update():
+	# Matcher lookups: a freed slot is matched on (type, practitioner | specialization, date window).
+	frappe.db.add_index("Appointment Waitlist", ["status", "appointment_type", "practitioner", "from_date"])
+	frappe.db.add_index("Appointment Waitlist", ["status", "appointment_type", "specialization", "from_date"])
+	# Hold checks on the booking path and the expiry sweep.
+	frappe.db.add_index("Appointment Waitlist", ["status", "offered_practitioner", "offered_date"])
+	frappe.db.add_index("Appointment Waitlist", ["status", "offer_expires_at"])
@@ -0,0 +1,172 @@
+# Copyright (c) 2025, chai and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_to_date, getdate, now_datetime
+
+from medinova.api import compute_available_start_times
+from medinova.waitlist import (
+	accept_waitlist_offer,
+	expire_waitlist_offers,
+	join_waitlist,
+	offer_released_slot,
+)
+
+PRACTITIONER = "_TEST-PR-WL"
+APPOINTMENT_TYPE = "_Test Waitlist Visit"
+PORTAL_USER = "waitlist.portal@example.com"
+
+
+def run_offer_jobs(enqueue):
+	"""Runs the back-fill jobs captured from `frappe.enqueue` the way the short queue would."""
+	for call in enqueue.call_args_list:
+		if call.args and call.args[0] == "medinova.waitlist.offer_released_slot":
+			kwargs = {k: v for k, v in call.kwargs.items() if k not in ("queue", "enqueue_after_commit")}
+			offer_released_slot(**kwargs)
+
+
+class TestAppointmentWaitlist(FrappeTestCase):
+	def setUp(self):
+		if not frappe.db.exists("Appointment Type", APPOINTMENT_TYPE):
+			frappe.get_doc(
+				{"doctype": "Appointment Type", "type_name": APPOINTMENT_TYPE, "default_duration_mins": 30}
+			).insert()
+		if not frappe.db.exists("Practitioner", PRACTITIONER):
+			frappe.get_doc({"doctype": "Practitioner", "practitioner_id": PRACTITIONER}).insert()
+		for patient_id, full_name in (
+			("_TEST-PT-WL-1", "Cancelling Patient"),
+			("_TEST-PT-WL-2", "Routine Patient"),
+			("_TEST-PT-WL-3", "Urgent Patient"),
+		):
+			if not frappe.db.exists("Patient", patient_id):
+				frappe.get_doc({"doctype": "Patient", "patient_id": patient_id, "full_name": full_name}).insert()
+
+		self.date = add_days(getdate(), 3)
+		self.appointment = frappe.get_doc(
+			{
+				"doctype": "Make Appointment",
+				"patient": "_TEST-PT-WL-1",
+				"practitioner": PRACTITIONER,
+				"appointment_type": APPOINTMENT_TYPE,
+				"appointment_date": self.date,
+				"start_time": "10:00:00",
+				"status": "Booked",
+			}
+		).insert()
+
+		# The routine entry waits longer, the urgent one has the higher priority.
+		self.routine = self.make_entry("_TEST-PT-WL-2", priority=0)
+		self.urgent = self.make_entry("_TEST-PT-WL-3", priority=5)
+
+	def tearDown(self):
+		frappe.set_user("Administrator")
+		frappe.db.delete("Appointment Waitlist", {"patient": ("like", "_TEST-PT-WL-%")})
+		frappe.db.delete("Make Appointment", {"practitioner": PRACTITIONER})
+		frappe.db.set_value("Patient", "_TEST-PT-WL-2", "linked_user", None)
+
+	def make_entry(self, patient, priority):
+		return frappe.get_doc(
+			{
+				"doctype": "Appointment Waitlist",
+				"patient": patient,
+				"appointment_type": APPOINTMENT_TYPE,
+				"practitioner": PRACTITIONER,
+				"from_date": self.date,
+				"to_date": self.date,
+				"priority": priority,
+			}
+		).insert()
+
+	def cancel_appointment(self):
+		with patch("frappe.enqueue") as enqueue:
+			self.appointment.status = "Cancelled"
+			self.appointment.save()
+		run_offer_jobs(enqueue)
+
+	def book(self, patient):
+		return frappe.get_doc(
+			{
+				"doctype": "Make Appointment",
+				"patient": patient,
+				"practitioner": PRACTITIONER,
+				"appointment_type": APPOINTMENT_TYPE,
+				"appointment_date": self.date,
+				"start_time": "10:00:00",
+				"status": "Booked",
+			}
+		).insert()
+
+	def test_cancellation_offers_slot_to_highest_priority(self):
+		self.cancel_appointment()
+
+		self.urgent.reload()
+		self.routine.reload()
+		self.assertEqual(self.urgent.status, "Offered")
+		self.assertEqual(str(self.urgent.offered_start_time), "10:00:00")
+		self.assertEqual(self.urgent.source_appointment, self.appointment.name)
+		self.assertEqual(self.routine.status, "Waiting")
+
+	def test_hold_blocks_others_but_not_the_held_patient(self):
+		self.cancel_appointment()
+
+		self.assertRaises(frappe.ValidationError, self.book, "_TEST-PT-WL-2")
+
+		booked = accept_waitlist_offer(self.urgent.name)["appointment_name"]
+		self.urgent.reload()
+		self.assertEqual(self.urgent.status, "Booked")
+		self.assertEqual(self.urgent.booked_appointment, booked)
+		self.assertEqual(frappe.db.get_value("Make Appointment", booked, "patient"), "_TEST-PT-WL-3")
+
+	def test_held_slot_is_not_offered_to_others(self):
+		practitioner = frappe.get_doc("Practitioner", PRACTITIONER)
+		practitioner.set(
+			"availability_schedule",
+			[{"day_of_week": self.date.strftime("%A"), "start_time": "09:00:00", "end_time": "12:00:00"}],
+		)
+		practitioner.save()
+
+		self.cancel_appointment()
+
+		slots = compute_available_start_times(PRACTITIONER, self.date, APPOINTMENT_TYPE)["available_slots"]
+		self.assertIn("09:00", slots)
+		self.assertIn("10:30", slots)
+		self.assertNotIn("10:00", slots)
+		self.assertNotIn("09:45", slots)
+
+	def test_expired_hold_is_offered_to_next_patient(self):
+		self.cancel_appointment()
+		frappe.db.set_value(
+			"Appointment Waitlist", self.urgent.name, "offer_expires_at", add_to_date(now_datetime(), minutes=-1)
+		)
+
+		with patch("frappe.enqueue") as enqueue:
+			expire_waitlist_offers()
+		run_offer_jobs(enqueue)
+
+		self.urgent.reload()
+		self.routine.reload()
+		self.assertEqual(self.urgent.status, "Expired")
+		self.assertEqual(self.routine.status, "Offered")
+		self.assertEqual(str(self.routine.offered_start_time), "10:00:00")
+
+	def test_portal_user_joins_only_for_own_patient(self):
+		if not frappe.db.exists("User", PORTAL_USER):
+			frappe.get_doc(
+				{"doctype": "User", "email": PORTAL_USER, "first_name": "Waitlist", "user_type": "Website User"}
+			).insert()
+		frappe.db.set_value("Patient", "_TEST-PT-WL-2", "linked_user", PORTAL_USER)
+
+		frappe.set_user(PORTAL_USER)
+		entry = join_waitlist("_TEST-PT-WL-2", APPOINTMENT_TYPE, self.date, self.date, practitioner=PRACTITIONER)
+		self.assertEqual(frappe.db.get_value("Appointment Waitlist", entry, "patient"), "_TEST-PT-WL-2")
+		self.assertRaises(
+			frappe.PermissionError,
+			join_waitlist,
+			"_TEST-PT-WL-3",
+			APPOINTMENT_TYPE,
+			self.date,
+			self.date,
+		)
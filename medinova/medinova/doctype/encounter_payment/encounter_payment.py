@@ -1,9 +1,20 @@
 # Copyright (c) 2025, chai and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+from medinova.revenue import invalidate_payment
+
 
 class EncounterPayment(Document):
-	pass
+	def on_update(self):
+		invalidate_payment(self)
+
+	def on_trash(self):
+		invalidate_payment(self)
+
+
+def on_doctype_update():
+	# Payments are summed per encounter by the reconciliation report.
+	frappe.db.add_index("Encounter Payment", ["patient_encounter"])
@@ -0,0 +1,15 @@
+# Copyright (c) 2025, chai and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class EncounterSearchPosting(Document):
+	pass
+
+
+def on_doctype_update():
+	# Term lookups, optionally narrowed to one patient, and per-encounter reindexing.
+	frappe.db.add_index("Encounter Search Posting", ["term", "patient"])
+	frappe.db.add_index("Encounter Search Posting", ["encounter"])
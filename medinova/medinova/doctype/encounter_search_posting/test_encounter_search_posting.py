@@ -0,0 +1,13 @@
+# Copyright (c) 2025, chai and Contributors
+# See license.txt
+
+# import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from medinova.clinical_search import tokenize
+
+
+class TestEncounterSearchPosting(FrappeTestCase):
+	def test_abbreviations_expand_both_ways(self):
+		self.assertEqual(tokenize("r/o cardiac"), ["r/o", "rule", "out", "cardiac"])
+		self.assertTrue({"chest", "pain"} <= set(tokenize("pt c/o CP")))
@@ -39,11 +39,14 @@ frappe.ui.form.on('Make Appointment', {
     }
 });
 
-function get_available_start_times(frm) {
-    frm.set_value('start_time', null);
-    frm.set_value('end_time', null);
+function get_available_start_times(frm, keep_selection) {
+    if (!keep_selection) {
+        frm.set_value('start_time', null);
+        frm.set_value('end_time', null);
+    }
     let slot_display_wrapper = frm.fields_dict.available_slots_display.$wrapper;
     slot_display_wrapper.html('');
+    watch_slot_changes(frm);
 
     if (frm.doc.practitioner && frm.doc.appointment_date && frm.doc.appointment_type) {
         frm.dashboard.show_progress('Checking Schedule', 'Finding available times...');
@@ -58,35 +61,80 @@ function get_available_start_times(frm) {
             callback: function(r) {
                 frm.dashboard.hide_progress();
                 if (r.message && r.message.available_slots) {
-                    const slots = r.message.available_slots;
-                    if (slots.length > 0) {
-                        let html = `<div><label>Click an available start time:</label></div>`;
-                        slots.forEach(slot => {
-                            html += `<button class="btn btn-default btn-sm slot-btn" 
-                                            style="margin: 0 5px 5px 0;" 
-                                            data-slot-time="${slot}">
-                                        ${slot}
-                                    </button>`;
-                        });
-                        slot_display_wrapper.html(html);
-
-                        slot_display_wrapper.on('click', '.slot-btn', function() {
-                            const selected_time = $(this).data('slot-time');
-                            frm.set_value('start_time', selected_time);
-                            calculate_and_set_end_time(frm);
-                            slot_display_wrapper.find('.slot-btn').removeClass('btn-success').addClass('btn-default');
-                            $(this).removeClass('btn-default').addClass('btn-success');
-                        });
-                    } else {
-                        let no_slots_html = `<div class="alert alert-warning">No time slots are available for this service on the selected date.</div>`;
-                        slot_display_wrapper.html(no_slots_html);
-                    }
+                    frm.slot_state.slots = r.message.available_slots;
+                    frm.slot_state.duration_mins = r.message.duration_mins;
+                    render_slot_buttons(frm);
                 }
             }
         });
     }
 }
 
+function render_slot_buttons(frm) {
+    let slot_display_wrapper = frm.fields_dict.available_slots_display.$wrapper;
+    const slots = frm.slot_state.slots;
+    const selected = frm.doc.start_time ? frm.doc.start_time.slice(0, 5) : null;
+
+    if (slots.length > 0) {
+        let html = `<div><label>Click an available start time:</label></div>`;
+        slots.forEach(slot => {
+            const btn_class = slot === selected ? 'btn-success' : 'btn-default';
+            html += `<button class="btn ${btn_class} btn-sm slot-btn" 
+                            style="margin: 0 5px 5px 0;" 
+                            data-slot-time="${slot}">
+                        ${slot}
+                    </button>`;
+        });
+        slot_display_wrapper.html(html);
+
+        slot_display_wrapper.off('click', '.slot-btn').on('click', '.slot-btn', function() {
+            const selected_time = $(this).data('slot-time');
+            frm.set_value('start_time', selected_time);
+            calculate_and_set_end_time(frm);
+            slot_display_wrapper.find('.slot-btn').removeClass('btn-success').addClass('btn-default');
+            $(this).removeClass('btn-default').addClass('btn-success');
+        });
+    } else {
+        let no_slots_html = `<div class="alert alert-warning">No time slots are available for this service on the selected date.</div>`;
+        slot_display_wrapper.html(no_slots_html);
+    }
+}
+
+function watch_slot_changes(frm) {
+    if (frm.slot_state && frm.slot_state.unsubscribe) {
+        frm.slot_state.unsubscribe();
+    }
+    frm.slot_state = { slots: [], duration_mins: 0 };
+    frm.slot_state.unsubscribe = medinova.slots.subscribe(
+        frm.doc.practitioner,
+        frm.doc.appointment_date,
+        (data) => on_slot_change(frm, data)
+    );
+}
+
+function on_slot_change(frm, data) {
+    // Desk sockets also get the website-room copy, which has no appointment name; use the site-room one.
+    if (data.source === 'portal') return;
+    if (data.appointment === frm.doc.name || !frm.doc.appointment_type) return;
+
+    if (data.action === 'released') {
+        // A freed interval may open several start times; recompute once.
+        get_available_start_times(frm, true);
+        return;
+    }
+
+    const selected = frm.doc.start_time ? frm.doc.start_time.slice(0, 5) : null;
+    frm.slot_state.slots = medinova.slots.remove_overlapping(
+        frm.slot_state.slots, frm.slot_state.duration_mins, data.start_time, data.end_time
+    );
+    if (selected && !frm.slot_state.slots.includes(selected)) {
+        frm.set_value('start_time', null);
+        frm.set_value('end_time', null);
+        frappe.show_alert({ message: __('Your selected time was just booked by someone else.'), indicator: 'orange' });
+    }
+    render_slot_buttons(frm);
+}
+
 function calculate_and_set_end_time(frm) {
     if (frm.doc.start_time && frm.doc.appointment_type) {
         frappe.db.get_value('Appointment Type', frm.doc.appointment_type, 'default_duration_mins')
@@ -5,6 +5,11 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import get_datetime, get_time
 from datetime import timedelta, datetime
+from medinova.day_sheet import clear_appointment_day_sheets
+from medinova.portal import bump_appointment_users
+from medinova.revenue import invalidate_appointment
+from medinova.slots import publish_slot_changes
+from medinova.waitlist import get_active_hold, on_appointment_change
 
 class MakeAppointment(Document):
     def before_save(self):
@@ -20,6 +25,20 @@ class MakeAppointment(Document):
         
         self.validate_practitioner_availability()
 
+    def on_update(self):
+        on_appointment_change(self, "on_update")
+        publish_slot_changes(self, "on_update")
+        invalidate_appointment(self, "on_update")
+        bump_appointment_users(self)
+        clear_appointment_day_sheets(self)
+
+    def on_trash(self):
+        on_appointment_change(self, "on_trash")
+        publish_slot_changes(self, "on_trash")
+        invalidate_appointment(self, "on_trash")
+        bump_appointment_users(self)
+        clear_appointment_day_sheets(self)
+
     def set_end_time(self):
         """
         Calculates and sets the end_time. This version is robust and handles
@@ -69,3 +88,15 @@ class MakeAppointment(Document):
                 f"Practitioner is already booked for this time slot. Conflicting Appointment: {overlapping_appointment}"
             )
 
+        if self.status != "Cancelled":
+            held_by = get_active_hold(
+                self.practitioner, self.appointment_date, self.start_time, self.end_time, patient=self.patient
+            )
+            if held_by:
+                frappe.throw(
+                    f"This time slot is on hold for a waitlisted patient. Waitlist Entry: {held_by}"
+                )
+
+
+def on_doctype_update():
+    frappe.db.add_index("Make Appointment", ["appointment_date", "status"])
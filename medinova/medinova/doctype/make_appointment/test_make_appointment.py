@@ -1,9 +1,31 @@
 # Copyright (c) 2025, chai and Contributors
 # See license.txt
 
-# import frappe
+from datetime import date, datetime, timedelta
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from medinova.bulk_export import appointment_to_fhir
+
+FHIR_INSTANT = r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2}$"
+
 
 class TestMakeAppointment(FrappeTestCase):
-	pass
+	def test_fhir_times_are_iso_instants(self):
+		resource = appointment_to_fhir(
+			frappe._dict(
+				name="_TEST-APPT-FHIR",
+				appointment_date=date(2025, 11, 20),
+				start_time=timedelta(hours=9),
+				end_time=timedelta(hours=9, minutes=30),
+				modified=datetime(2025, 11, 19, 18, 5, 7, 123456),
+				status="Booked",
+			)
+		)
+
+		self.assertTrue(resource["start"].startswith("2025-11-20T09:00:00"))
+		self.assertTrue(resource["end"].startswith("2025-11-20T09:30:00"))
+		self.assertTrue(resource["meta"]["lastUpdated"].startswith("2025-11-19T18:05:07"))
+		for value in (resource["start"], resource["end"], resource["meta"]["lastUpdated"]):
+			self.assertRegex(value, FHIR_INSTANT)
@@ -1,9 +1,34 @@
 # Copyright (c) 2025, chai and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+from medinova.archive import check_archived_links, rename_archived_links
+from medinova.day_sheet import clear_patient_day_sheets
+from medinova.patient_search import index_patient, remove_patient, rename_patient
+from medinova.portal import bump_patient_users
+
 
 class Patient(Document):
-	pass
+	def on_update(self):
+		index_patient(self)
+		bump_patient_users(self)
+		clear_patient_day_sheets(self)
+
+	def on_trash(self):
+		check_archived_links(self)
+		remove_patient(self)
+		bump_patient_users(self)
+		clear_patient_day_sheets(self)
+
+	def after_rename(self, old, new, merge=False):
+		rename_patient(old, new)
+		rename_archived_links(self.doctype, old, new)
+
+
+def on_doctype_update():
+	# medinova.portal.get_user_patients finds a portal user's patients by any of these.
+	frappe.db.add_index("Patient", ["linked_user"])
+	frappe.db.add_index("Patient", ["email"])
+	frappe.db.add_index("Patient", ["owner"])
@@ -1,9 +1,31 @@
 # Copyright (c) 2025, chai and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
+from medinova.clinical_search import index_encounter, remove_encounter
+from medinova.day_sheet import clear_encounter_day_sheets
+from medinova.revenue import invalidate_encounter
+from medinova.vitals import delete_encounter_vitals, sync_encounter_vitals
+
 
 class PatientEncounter(Document):
-	pass
+	def on_update(self):
+		sync_encounter_vitals(self)
+		index_encounter(self)
+		invalidate_encounter(self)
+		clear_encounter_day_sheets(self)
+
+	def on_trash(self):
+		delete_encounter_vitals(self)
+		remove_encounter(self)
+		invalidate_encounter(self)
+		clear_encounter_day_sheets(self)
+
+
+def on_doctype_update():
+	# Patient timeline pages and "latest encounter per patient" lookups.
+	frappe.db.add_index("Patient Encounter", ["patient", "encounter_datetime"])
+	# Range scan for the nightly archival of old, settled encounters.
+	frappe.db.add_index("Patient Encounter", ["encounter_datetime"])
@@ -1,9 +1,94 @@
 # Copyright (c) 2025, chai and Contributors
 # See license.txt
 
-# import frappe
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from medinova.ai_backfill import (
+	AsyncRateLimiter,
+	MockProvider,
+	backfill_ai_summaries,
+	get_checkpoint,
+	summarize_encounters,
+)
+
+ENCOUNTERS = ("_TEST-ENC-AI-1", "_TEST-ENC-AI-2", "_TEST-ENC-AI-3")
+# Other unsummarised encounters on the site must not take the fixtures' place in a batch.
+ONLY_FIXTURES = {"name": ("in", ENCOUNTERS)}
+
+
+class FailingProvider(MockProvider):
+	async def summarize(self, prompt):
+		raise ValueError("provider down")
+
 
 class TestPatientEncounter(FrappeTestCase):
-	pass
+	def setUp(self):
+		for encounter_id in ENCOUNTERS:
+			if not frappe.db.exists("Patient Encounter", encounter_id):
+				frappe.get_doc(
+					{
+						"doctype": "Patient Encounter",
+						"encounter_id": encounter_id,
+						"clinical_notes": f"pt c/o CP since 2 days, r/o cardiac ({encounter_id})",
+					}
+				).insert()
+		self.modified = dict(
+			frappe.get_all(
+				"Patient Encounter", filters={"name": ("in", ENCOUNTERS)}, fields=["name", "modified"], as_list=True
+			)
+		)
+
+	def tearDown(self):
+		for encounter_id in ENCOUNTERS:
+			frappe.delete_doc("Patient Encounter", encounter_id, force=True)
+		frappe.db.commit()
+
+	def get_summary(self, encounter):
+		return frappe.db.get_value("Patient Encounter", encounter, "ai_summary")
+
+	def test_backfill_resumes_from_checkpoint(self):
+		# A failed batch still moves the checkpoint, so the next run does not retry it ...
+		first = backfill_ai_summaries(
+			FailingProvider(), batch_size=1, limit=1, reset=True, filters=ONLY_FIXTURES
+		)
+		self.assertEqual((first["processed"], first["failed"]), (1, 1))
+		self.assertEqual(get_checkpoint(), first["checkpoint"])
+
+		backfill_ai_summaries(MockProvider(latency=0), batch_size=2, filters=ONLY_FIXTURES)
+		self.assertIsNone(self.get_summary(first["checkpoint"]))
+		for encounter in ENCOUNTERS:
+			if encounter != first["checkpoint"]:
+				self.assertTrue(self.get_summary(encounter))
+				modified, modified_by = frappe.db.get_value(
+					"Patient Encounter", encounter, ["modified", "modified_by"]
+				)
+				self.assertGreater(modified, self.modified[encounter])
+				self.assertEqual(modified_by, frappe.session.user)
+
+		# ... until it is reset.
+		backfill_ai_summaries(MockProvider(latency=0), batch_size=2, reset=True, filters=ONLY_FIXTURES)
+		self.assertTrue(self.get_summary(first["checkpoint"]))
+
+	def test_rate_limits_back_off_and_retry(self):
+		encounters = [
+			frappe._dict(name=name, clinical_notes=f"follow-up visit {name}") for name in ENCOUNTERS
+		]
+		provider = MockProvider(latency=0, rate_limit_every=2)
+		limiter = AsyncRateLimiter(60000)
+
+		with patch("medinova.ai_backfill.asyncio.sleep", new_callable=AsyncMock) as sleep:
+			loop = asyncio.new_event_loop()
+			try:
+				results = loop.run_until_complete(summarize_encounters(provider, encounters, 1, limiter))
+			finally:
+				loop.close()
+
+		self.assertTrue(all(summary for encounter, summary in results))
+		self.assertGreater(provider.calls, len(encounters))
+		self.assertLess(limiter.rate, limiter.max_rate)
+		# The first retry after a 429 waits 2**0 seconds.
+		self.assertIn(1, [call.args[0] for call in sleep.await_args_list])
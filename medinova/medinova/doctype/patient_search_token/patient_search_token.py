@@ -0,0 +1,15 @@
+# Copyright (c) 2025, chai and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class PatientSearchToken(Document):
+	pass
+
+
+def on_doctype_update():
+	# Postings lookups read (token -> patient) straight off this index.
+	frappe.db.add_index("Patient Search Token", ["token", "patient"])
+	frappe.db.add_index("Patient Search Token", ["patient"])
@@ -0,0 +1,90 @@
+# Copyright (c) 2025, chai and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from medinova.patient_search import (
+	EMAIL,
+	NAME,
+	PATIENT_ID,
+	PHONE,
+	best_patient_match,
+	get_query_tokens,
+	normalise_phone,
+	search,
+)
+
+PATIENTS = (
+	("_TEST-PT-PS-1", "Aarav Sharma", "+91 98450 12345", "aarav.sharma@example.com"),
+	("_TEST-PT-PS-2", "Aarav Sharman", "9845012346", "aarav.sharman@example.com"),
+	("_TEST-PT-PS-3", "Kavya Rao", "9000000003", "kavya.rao@example.com"),
+)
+
+
+class TestPatientSearchToken(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		for patient_id, full_name, contact_number, email in PATIENTS:
+			if not frappe.db.exists("Patient", patient_id):
+				frappe.get_doc(
+					{
+						"doctype": "Patient",
+						"patient_id": patient_id,
+						"full_name": full_name,
+						"contact_number": contact_number,
+						"email": email,
+					}
+				).insert()
+
+	def test_normalise_phone(self):
+		self.assertEqual(normalise_phone("+91 98450-12345"), "9845012345")
+		self.assertEqual(normalise_phone("(0) 98450 12345"), "9845012345")
+		self.assertEqual(normalise_phone("12345"), "12345")
+		self.assertEqual(normalise_phone(None), "")
+
+	def test_query_tokens(self):
+		exact, grams = get_query_tokens("+91 98450-12345")
+		self.assertIn(f"{PHONE}=9845012345", exact)
+		self.assertTrue(grams)
+		self.assertTrue(all(g.startswith(f"{PHONE}:") for g in grams))
+
+		exact, grams = get_query_tokens("Aarav.Sharma@Example.com")
+		self.assertEqual(exact, {f"{EMAIL}=aarav.sharma@example.com"})
+		self.assertTrue(all(g.startswith(f"{EMAIL}:") for g in grams))
+
+		exact, grams = get_query_tokens("Aarav")
+		self.assertEqual(exact, {f"{PATIENT_ID}=aarav"})
+		self.assertTrue(all(g.startswith(f"{NAME}:") for g in grams))
+
+		exact, grams = get_query_tokens("PT-0042")
+		self.assertIn(f"{PATIENT_ID}=pt-0042", exact)
+		self.assertTrue(all(g.startswith(f"{PATIENT_ID}:") for g in grams))
+
+	def assertRanksFirst(self, query, patient):
+		results = search(query)
+		self.assertTrue(results, f"no results for {query!r}")
+		self.assertEqual(results[0].name, patient)
+		return results
+
+	def test_exact_hits_rank_first(self):
+		results = self.assertRanksFirst("98450 12345", "_TEST-PT-PS-1")
+		self.assertEqual(results[0].score, 1.0)
+		self.assertRanksFirst("Aarav.Sharman@example.com", "_TEST-PT-PS-2")
+		self.assertRanksFirst("_test-pt-ps-3", "_TEST-PT-PS-3")
+
+	def test_typos_are_tolerated(self):
+		self.assertRanksFirst("Arav Sharma", "_TEST-PT-PS-1")
+		self.assertRanksFirst("Kavia Rao", "_TEST-PT-PS-3")
+
+	def test_filters_restrict_results(self):
+		results = search("Aarav Sharma", filters={"name": ("!=", "_TEST-PT-PS-1")})
+		self.assertNotIn("_TEST-PT-PS-1", [p.name for p in results])
+		self.assertIn("_TEST-PT-PS-2", [p.name for p in results])
+
+	def test_best_match_must_be_unique(self):
+		self.assertEqual(best_patient_match("98450 12345"), "_TEST-PT-PS-1")
+		self.assertEqual(best_patient_match("Kavya Rao"), "_TEST-PT-PS-3")
+		# "Aarav Sharman" scores above the threshold too, so neither is picked.
+		self.assertIsNone(best_patient_match("Aarav Sharma"))
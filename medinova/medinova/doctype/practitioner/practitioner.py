@@ -4,6 +4,17 @@
 # import frappe
 from frappe.model.document import Document
 
+from medinova.archive import check_archived_links, rename_archived_links
+from medinova.portal import bump_catalog
+
 
 class Practitioner(Document):
-	pass
+	def on_update(self):
+		bump_catalog()
+
+	def on_trash(self):
+		check_archived_links(self)
+		bump_catalog()
+
+	def after_rename(self, old, new, merge=False):
+		rename_archived_links(self.doctype, old, new)
@@ -1,9 +1,55 @@
 # Copyright (c) 2025, chai and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from medinova.clinic_grid import STATE_CLOSED, STATE_OVER_CAPACITY, build_grid, grid_states
+
+
+def schedule(practitioner, start_time, end_time, max_parallel_appointments=1):
+	return frappe._dict(
+		practitioner=practitioner,
+		full_name=practitioner,
+		start_time=start_time,
+		end_time=end_time,
+		max_parallel_appointments=max_parallel_appointments,
+	)
+
+
+def booking(practitioner, start_time, end_time):
+	return frappe._dict(practitioner=practitioner, start_time=start_time, end_time=end_time)
+
 
 class TestPractitioner(FrappeTestCase):
-	pass
+	def test_clinic_grid_sums_overlapping_schedules(self):
+		practitioners, _names, day_start, capacity, occupancy = build_grid(
+			[
+				schedule("_TEST-PR-A", "09:00:00", "10:00:00"),
+				schedule("_TEST-PR-A", "09:30:00", "10:30:00", 2),
+			],
+			[booking("_TEST-PR-A", "09:00:00", "09:20:00")],
+		)
+
+		self.assertEqual(practitioners, ["_TEST-PR-A"])
+		self.assertEqual(day_start, 9 * 60)
+		self.assertEqual(capacity.tolist(), [[1, 1, 3, 3, 2, 2]])
+		self.assertEqual(occupancy.tolist(), [[1, 1, 0, 0, 0, 0]])
+
+	def test_clinic_grid_skips_sub_slot_windows(self):
+		practitioners, _names, _day_start, capacity, occupancy = build_grid(
+			[
+				schedule("_TEST-PR-A", "09:00:00", "09:30:00"),
+				# Shorter than a slot and inside one: no slot is fully covered.
+				schedule("_TEST-PR-A", "09:35:00", "09:40:00", 3),
+				schedule("_TEST-PR-B", "09:05:00", "09:10:00"),
+			],
+			[],
+		)
+
+		self.assertEqual(practitioners, ["_TEST-PR-A", "_TEST-PR-B"])
+		self.assertEqual(capacity.tolist(), [[1, 1, 0], [0, 0, 0]])
+
+		states = grid_states(capacity, occupancy)
+		self.assertNotIn(STATE_OVER_CAPACITY, states.tolist()[0] + states.tolist()[1])
+		self.assertEqual(states.tolist()[1], [STATE_CLOSED] * 3)
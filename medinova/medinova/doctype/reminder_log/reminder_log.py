@@ -0,0 +1,14 @@
+# Copyright (c) 2025, chai and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ReminderLog(Document):
+	pass
+
+
+def on_doctype_update():
+	# The dedupe ledger: one reminder per appointment, channel and day, ever.
+	frappe.db.add_unique("Reminder Log", ["appointment", "channel", "reminder_date"])
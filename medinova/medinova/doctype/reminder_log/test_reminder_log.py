@@ -0,0 +1,65 @@
+# Copyright (c) 2025, chai and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, getdate
+
+from medinova.reminders import StubGateway, send_appointment_reminders
+
+
+class TestReminderLog(FrappeTestCase):
+	def setUp(self):
+		if not frappe.db.exists("Appointment Type", "_Test Reminder Visit"):
+			frappe.get_doc(
+				{"doctype": "Appointment Type", "type_name": "_Test Reminder Visit", "default_duration_mins": 30}
+			).insert()
+		if not frappe.db.exists("Practitioner", "_TEST-PR-REM"):
+			frappe.get_doc({"doctype": "Practitioner", "practitioner_id": "_TEST-PR-REM"}).insert()
+		if not frappe.db.exists("Patient", "_TEST-PT-REM"):
+			frappe.get_doc(
+				{
+					"doctype": "Patient",
+					"patient_id": "_TEST-PT-REM",
+					"full_name": "Reminder Patient",
+					"email": "reminder.patient@example.com",
+				}
+			).insert()
+
+		self.reminder_date = add_days(getdate(), 1)
+		self.appointment = frappe.get_doc(
+			{
+				"doctype": "Make Appointment",
+				"patient": "_TEST-PT-REM",
+				"practitioner": "_TEST-PR-REM",
+				"appointment_type": "_Test Reminder Visit",
+				"appointment_date": self.reminder_date,
+				"start_time": "09:00:00",
+				"status": "Booked",
+			}
+		).insert()
+
+	def tearDown(self):
+		frappe.db.delete("Reminder Log", {"appointment": self.appointment.name})
+		frappe.delete_doc("Make Appointment", self.appointment.name, force=True)
+
+	def test_reminder_is_sent_once(self):
+		gateway = StubGateway()
+		send_appointment_reminders(self.reminder_date, gateway=gateway)
+		send_appointment_reminders(self.reminder_date, gateway=gateway)
+
+		emails = [m for channel, m in gateway.sent if channel == "Email" and m.appointment == self.appointment.name]
+		self.assertEqual(len(emails), 1)
+
+	def test_failed_send_is_retried(self):
+		gateway = StubGateway(fail_first=1)
+		with patch("medinova.reminders.time.sleep") as sleep:
+			send_appointment_reminders(self.reminder_date, gateway=gateway)
+
+		sleep.assert_called()
+
+		self.assertTrue(
+			frappe.db.exists("Reminder Log", {"appointment": self.appointment.name, "channel": "Email"})
+		)
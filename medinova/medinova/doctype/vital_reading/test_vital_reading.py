@@ -0,0 +1,31 @@
+# Copyright (c) 2025, chai and Contributors
+# See license.txt
+
+# import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from medinova.vitals import normalise_vital
+
+
+class TestVitalReading(FrappeTestCase):
+	def test_blood_pressure_is_split(self):
+		reading = normalise_vital("BP", "130/85", "mmHg")
+		self.assertEqual(reading["vital_code"], "blood_pressure")
+		self.assertEqual((reading["systolic"], reading["diastolic"]), (130, 85))
+
+	def test_units_are_canonicalised(self):
+		self.assertEqual(normalise_vital("Temp", "98.6", "F")["value"], 37.0)
+		self.assertEqual(normalise_vital("Blood Sugar", "5.5", "mmol/L")["value"], 99.1)
+
+	def test_unknown_vital_is_skipped(self):
+		self.assertIsNone(normalise_vital("Mood", "good"))
+
+	def test_height_in_feet_is_converted(self):
+		self.assertEqual(normalise_vital("Height", "5.5", "ft")["value"], 167.6)
+		self.assertEqual(normalise_vital("Ht", "5'9\"", None)["value"], 175.3)
+		self.assertEqual(normalise_vital("Height", "5 ft 9 in", "")["value"], 175.3)
+		self.assertEqual(normalise_vital("Height", "170", "cm")["value"], 170)
+
+	def test_unknown_units_are_skipped(self):
+		self.assertIsNone(normalise_vital("Height", "170", "cubits"))
+		self.assertIsNone(normalise_vital("Weight", "11", "stone"))
@@ -0,0 +1,15 @@
+# Copyright (c) 2025, chai and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class VitalReading(Document):
+	pass
+
+
+def on_doctype_update():
+	# Trend reads are a single range scan on this index.
+	frappe.db.add_index("Vital Reading", ["patient", "vital_code", "measured_at"])
+	frappe.db.add_index("Vital Reading", ["encounter"])
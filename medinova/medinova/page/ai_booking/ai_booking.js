@@ -20,6 +20,42 @@ frappe.pages['ai-booking'].on_page_load = function (wrapper) {
 
     let conversation_history = [];
     let confirmed_entities = {};
+    let slot_watch = { slots: [], duration_mins: 0, options: null, unsubscribe: () => {} };
+
+    function slot_buttons_html(slots) {
+        return slots.map(slot =>
+            `<button class="btn btn-sm slot-btn" data-slot="${slot}">${slot}</button>`
+        ).join('');
+    }
+
+    // Keeps the most recently offered slot list in sync with bookings made elsewhere.
+    function watch_offered_slots(result, options) {
+        slot_watch.unsubscribe();
+        slot_watch = { slots: result.slots, duration_mins: result.duration_mins, options: options };
+        slot_watch.unsubscribe = medinova.slots.subscribe(
+            result.entities.practitioner,
+            result.entities.appointment_date,
+            on_slot_change
+        );
+    }
+
+    async function on_slot_change(data) {
+        // Desk sessions get every event on the site room as well; skip the portal copy.
+        if (data.source === 'portal') return;
+
+        if (data.action === 'released') {
+            const r = await frappe.call({
+                method: 'medinova.api.get_available_start_times',
+                args: confirmed_entities
+            });
+            slot_watch.slots = (r.message && r.message.available_slots) || [];
+        } else {
+            slot_watch.slots = medinova.slots.remove_overlapping(
+                slot_watch.slots, slot_watch.duration_mins, data.start_time, data.end_time
+            );
+        }
+        slot_watch.options.html(slot_buttons_html(slot_watch.slots));
+    }
 
     function add_message(message_text, sender, type = 'text') {
         let bubble_html = '';
@@ -27,9 +63,7 @@ frappe.pages['ai-booking'].on_page_load = function (wrapper) {
         if (type === 'text') {
             bubble_html = `<div class="message-bubble">${message_text}</div>`;
         } else if (type === 'slots') {
-            const buttons_html = message_text.slots.map(slot =>
-                `<button class="btn btn-sm slot-btn" data-slot="${slot}">${slot}</button>`
-            ).join('');
+            const buttons_html = slot_buttons_html(message_text.slots);
 
             bubble_html = `
                 <div class="message-bubble">
@@ -39,8 +73,11 @@ frappe.pages['ai-booking'].on_page_load = function (wrapper) {
             confirmed_entities = message_text.entities;
         }
 
-        const message_html = `<div class="message ${sender}">${bubble_html}</div>`;
+        const message_html = $(`<div class="message ${sender}">${bubble_html}</div>`);
         chat_messages.append(message_html);
+        if (type === 'slots') {
+            watch_offered_slots(message_text, message_html.find('.slot-options'));
+        }
         chat_messages.scrollTop(chat_messages[0].scrollHeight);
     }
 
@@ -4,6 +4,13 @@
 import frappe
 from frappe import _
 
+from medinova.archive import union_table
+
+APPOINTMENT_FIELDS = [
+    "name", "appointment_id", "appointment_date", "start_time", "patient",
+    "practitioner", "appointment_type", "status", "payment_status",
+]
+
 def execute(filters=None):
     columns = [
         {
@@ -80,7 +87,7 @@ def execute(filters=None):
             app.status, 
             prac.consultation_fee, 
             app.payment_status
-        FROM `tabMake Appointment` as app
+        FROM {union_table("Make Appointment", APPOINTMENT_FIELDS)} as app
         LEFT JOIN `tabPractitioner` as prac ON app.practitioner = prac.name
         WHERE 1=1 {conditions}
         ORDER BY app.appointment_date DESC, app.start_time DESC
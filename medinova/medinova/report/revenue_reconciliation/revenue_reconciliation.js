@@ -0,0 +1,55 @@
+// Copyright (c) 2025, chai and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Revenue Reconciliation"] = {
+    "filters": [
+        {
+            "fieldname": "from_date",
+            "label": __("From Date"),
+            "fieldtype": "Date",
+            "default": frappe.datetime.month_start(),
+            "reqd": 1
+        },
+        {
+            "fieldname": "to_date",
+            "label": __("To Date"),
+            "fieldtype": "Date",
+            "default": frappe.datetime.get_today(),
+            "reqd": 1
+        },
+        {
+            "fieldname": "practitioner",
+            "label": __("Practitioner"),
+            "fieldtype": "Link",
+            "options": "Practitioner"
+        },
+        {
+            "fieldname": "mode_of_payment",
+            "label": __("Mode of Payment"),
+            "fieldtype": "Select",
+            "options": "\nCash\nCard\nUPI\nBank Transfer\nMixed\nUnpaid"
+        },
+        {
+            "fieldname": "group_by",
+            "label": __("Group By"),
+            "fieldtype": "Select",
+            "options": "Day, Practitioner and Mode\nPractitioner\nMode of Payment\nDay",
+            "default": "Day, Practitioner and Mode"
+        },
+        {
+            "fieldname": "view",
+            "label": __("View"),
+            "fieldtype": "Select",
+            "options": "Summary\nMismatches",
+            "default": "Summary"
+        }
+    ],
+
+    "formatter": function (value, row, column, data, default_formatter) {
+        value = default_formatter(value, row, column, data);
+        if (data && ((column.fieldname === "mismatches" && data.mismatches > 0) || column.fieldname === "reason")) {
+            value = `<span style="color: var(--red-600)">${value}</span>`;
+        }
+        return value;
+    }
+};
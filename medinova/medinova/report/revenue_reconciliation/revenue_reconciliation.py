@@ -0,0 +1,72 @@
+# Copyright (c) 2025, chai and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+
+from medinova.revenue import GROUP_KEYS, get_mismatches, get_reconciliation
+
+GROUP_COLUMNS = {
+    "day": {"label": _("Day"), "fieldname": "day", "fieldtype": "Date", "width": 110},
+    "practitioner": {
+        "label": _("Practitioner"),
+        "fieldname": "practitioner",
+        "fieldtype": "Link",
+        "options": "Practitioner",
+        "width": 180,
+    },
+    "mode_of_payment": {"label": _("Mode of Payment"), "fieldname": "mode_of_payment", "fieldtype": "Data", "width": 130},
+}
+
+SUMMARY_COLUMNS = [
+    {"label": _("Encounters"), "fieldname": "encounters", "fieldtype": "Int", "width": 100},
+    {"label": _("Billed"), "fieldname": "billed", "fieldtype": "Currency", "width": 130},
+    {"label": _("Paid"), "fieldname": "paid", "fieldtype": "Currency", "width": 130},
+    {"label": _("Outstanding"), "fieldname": "outstanding", "fieldtype": "Currency", "width": 130},
+    {"label": _("Collected %"), "fieldname": "collected_pct", "fieldtype": "Percent", "width": 110},
+    {"label": _("Mismatches"), "fieldname": "mismatches", "fieldtype": "Int", "width": 100},
+]
+
+MISMATCH_COLUMNS = [
+    {
+        "label": _("Encounter"),
+        "fieldname": "encounter",
+        "fieldtype": "Link",
+        "options": "Patient Encounter",
+        "width": 160,
+    },
+    GROUP_COLUMNS["day"],
+    {"label": _("Patient"), "fieldname": "patient", "fieldtype": "Link", "options": "Patient", "width": 160},
+    GROUP_COLUMNS["practitioner"],
+    GROUP_COLUMNS["mode_of_payment"],
+    {"label": _("Billed"), "fieldname": "billed", "fieldtype": "Currency", "width": 120},
+    {"label": _("Paid"), "fieldname": "paid", "fieldtype": "Currency", "width": 120},
+    {"label": _("Outstanding"), "fieldname": "outstanding", "fieldtype": "Currency", "width": 120},
+    {"label": _("Encounter Status"), "fieldname": "payment_status", "fieldtype": "Data", "width": 120},
+    {
+        "label": _("Appointment"),
+        "fieldname": "appointment",
+        "fieldtype": "Link",
+        "options": "Make Appointment",
+        "width": 140,
+    },
+    {"label": _("Appointment Status"), "fieldname": "appointment_payment_status", "fieldtype": "Data", "width": 130},
+    {"label": _("Reason"), "fieldname": "reason", "fieldtype": "Data", "width": 240},
+]
+
+
+def execute(filters=None):
+    filters = frappe._dict(filters or {})
+    if not (filters.from_date and filters.to_date):
+        frappe.throw(_("From Date and To Date are required."))
+
+    if filters.view == "Mismatches":
+        data = get_mismatches(filters.from_date, filters.to_date, filters.practitioner, filters.mode_of_payment)
+        return MISMATCH_COLUMNS, data
+
+    keys = GROUP_KEYS.get(filters.group_by) or GROUP_KEYS["Day, Practitioner and Mode"]
+    columns = [GROUP_COLUMNS[key] for key in keys] + SUMMARY_COLUMNS
+    data = get_reconciliation(
+        filters.from_date, filters.to_date, filters.practitioner, filters.mode_of_payment, filters.group_by
+    )
+    return columns, data
@@ -26,59 +26,130 @@ frappe.ready(function () {
         });
     });
 
+    // === Practitioners and appointment types, fetched with GET so the browser
+    // and any proxy can reuse them (ETag / max-age) across page loads. Plain
+    // fetch on a fixed URL: frappe.call adds a cache-busting `_=` parameter ===
+    const catalog = { practitioners: {}, appointment_types: {} };
+    fetch('/api/method/medinova.portal.booking_catalog', { headers: { Accept: 'application/json' } })
+        .then(r => (r.ok ? r.json() : Promise.reject(r)))
+        .then(r => {
+            const message = r.message || {};
+            (message.practitioners || []).forEach(p => { catalog.practitioners[p.name] = p; });
+            (message.appointment_types || []).forEach(t => { catalog.appointment_types[t.name] = t; });
+            show_booking_details();
+        })
+        // Only the field descriptions come from the catalog; the form works without them.
+        .catch(() => {});
+
+    function show_booking_details() {
+        const practitioner = catalog.practitioners[frappe.web_form.get_value('practitioner')];
+        const appointment_type = catalog.appointment_types[frappe.web_form.get_value('appointment_type')];
+
+        frappe.web_form.set_df_property('practitioner', 'description', practitioner
+            ? [practitioner.specialization, practitioner.consultation_fee && `Consultation fee: ${practitioner.consultation_fee}`]
+                .filter(Boolean).map(frappe.utils.escape_html).join(' · ')
+            : '');
+        frappe.web_form.set_df_property('appointment_type', 'description', appointment_type
+            ? [`${appointment_type.default_duration_mins || 30} minutes`, appointment_type.price && `Price: ${appointment_type.price}`]
+                .filter(Boolean).join(' · ')
+            : '');
+    }
+
     // === Trigger slot fetching when key fields change ===
     ['practitioner', 'appointment_date', 'appointment_type'].forEach(field => {
         frappe.web_form.on(field, show_available_slots);
     });
 
+    let slot_state = { slots: [], duration_mins: 0, unsubscribe: () => {} };
+
+    function get_slot_wrapper() {
+        // ✅ Update this selector with your actual HTML fieldname in Frappe
+        return $('[data-fieldname="available_slots_display"], [data-fieldname="available_slots"], [data-fieldname="slots_section"]');
+    }
+
     function show_available_slots() {
+        show_booking_details();
+
         const practitioner = frappe.web_form.get_value('practitioner');
         const appointment_date = frappe.web_form.get_value('appointment_date');
         const appointment_type = frappe.web_form.get_value('appointment_type');
 
         console.log("Fetching slots for:", { practitioner, appointment_date, appointment_type });
 
-        // ✅ Update this selector with your actual HTML fieldname in Frappe
-        const wrapper = $('[data-fieldname="available_slots_display"], [data-fieldname="available_slots"], [data-fieldname="slots_section"]');
+        const wrapper = get_slot_wrapper();
         wrapper.html('');
 
+        slot_state.unsubscribe();
+        slot_state = { slots: [], duration_mins: 0, unsubscribe: () => {} };
+
         if (!(practitioner && appointment_date && appointment_type)) {
             console.warn("❌ Missing field(s) for slot fetching");
             return;
         }
 
+        slot_state.unsubscribe = medinova.slots.subscribe(practitioner, appointment_date, on_slot_change);
+
         frappe.call({
             method: "medinova.medinova.web_form.new_appointment.new_appointment.get_available_slots",
-            args: { practitioner, appointment_date, appointment_type },
+            args: { practitioner, appointment_date, appointment_type, with_duration: 1 },
             freeze: true,
             freeze_message: "Loading available slots...",
             callback: function (r) {
                 console.log("🕒 Slots API Response:", r.message);
-                const slots = r.message || [];
-                if (!slots.length) {
-                    wrapper.html('<div class="alert alert-warning mt-2">No slots available for this date.</div>');
-                    return;
-                }
-
-                let html = `<div class="mt-2"><label><b>Available Slots:</b></label><br>`;
-                slots.forEach(slot => {
-                    html += `<button class="btn btn-outline-primary btn-sm slot-btn" data-slot="${slot}" style="margin:4px;">${slot}</button>`;
-                });
-                html += `</div>`;
-                wrapper.html(html);
-
-                wrapper.off('click', '.slot-btn').on('click', '.slot-btn', function () {
-                    const selected = $(this).data('slot');
-                    frappe.web_form.set_value('start_time', selected);
-                    calculate_end_time();
-
-                    $('.slot-btn').removeClass('btn-success').addClass('btn-outline-primary');
-                    $(this).removeClass('btn-outline-primary').addClass('btn-success');
-                });
+                const response = r.message || {};
+                slot_state.slots = response.available_slots || [];
+                slot_state.duration_mins = response.duration_mins;
+                render_slots();
             }
         });
     }
 
+    function render_slots() {
+        const wrapper = get_slot_wrapper();
+        const slots = slot_state.slots;
+        if (!slots.length) {
+            wrapper.html('<div class="alert alert-warning mt-2">No slots available for this date.</div>');
+            return;
+        }
+
+        const selected = (frappe.web_form.get_value('start_time') || '').slice(0, 5);
+        let html = `<div class="mt-2"><label><b>Available Slots:</b></label><br>`;
+        slots.forEach(slot => {
+            const btn_class = slot === selected ? 'btn-success' : 'btn-outline-primary';
+            html += `<button class="btn ${btn_class} btn-sm slot-btn" data-slot="${slot}" style="margin:4px;">${slot}</button>`;
+        });
+        html += `</div>`;
+        wrapper.html(html);
+
+        wrapper.off('click', '.slot-btn').on('click', '.slot-btn', function () {
+            const selected = $(this).data('slot');
+            frappe.web_form.set_value('start_time', selected);
+            calculate_end_time();
+
+            $('.slot-btn').removeClass('btn-success').addClass('btn-outline-primary');
+            $(this).removeClass('btn-outline-primary').addClass('btn-success');
+        });
+    }
+
+    // === Patch the slot list when someone else books or cancels ===
+    function on_slot_change(data) {
+        if (data.action === 'released') {
+            show_available_slots();
+            return;
+        }
+
+        const selected = (frappe.web_form.get_value('start_time') || '').slice(0, 5);
+        slot_state.slots = medinova.slots.remove_overlapping(
+            slot_state.slots, slot_state.duration_mins, data.start_time, data.end_time
+        );
+        if (selected && !slot_state.slots.includes(selected)) {
+            frappe.web_form.set_value('start_time', '');
+            frappe.web_form.set_value('end_time', '');
+            frappe.msgprint("The time you picked was just booked by someone else. Please choose another slot.");
+        }
+        render_slots();
+    }
+
     // === Auto-calculate end time ===
     frappe.web_form.on('start_time', calculate_end_time);
 
@@ -87,6 +158,13 @@ frappe.ready(function () {
         const appointment_type = frappe.web_form.get_value('appointment_type');
         if (!(start_time && appointment_type)) return;
 
+        // The catalog already has the duration; the server is only asked before it has loaded.
+        const type = catalog.appointment_types[appointment_type];
+        if (type) {
+            frappe.web_form.set_value('end_time', add_minutes(start_time, type.default_duration_mins || 30));
+            return;
+        }
+
         frappe.call({
             method: "medinova.medinova.web_form.new_appointment.new_appointment.calculate_end_time",
             args: { start_time, appointment_type },
@@ -97,6 +175,12 @@ frappe.ready(function () {
         });
     }
 
+    function add_minutes(time, minutes) {
+        const total = medinova.slots.to_minutes(time) + (parseInt(minutes, 10) || 0);
+        const pad = (n) => String(n).padStart(2, '0');
+        return `${pad(Math.floor(total / 60) % 24)}:${pad(total % 60)}:00`;
+    }
+
     // === Restrict past dates ===
     const date_field = frappe.web_form.get_field('appointment_date');
     if (date_field && date_field.$input) {
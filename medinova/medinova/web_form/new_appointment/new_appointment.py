@@ -8,6 +8,9 @@ from frappe import _
 def get_context(context):
     """Context for web form."""
     context.show_sidebar = False
+    # The rendered form carries the session's CSRF token, so the page itself must not be
+    # cached; the script loads practitioners and appointment types from the cacheable
+    # medinova.portal.booking_catalog instead.
     context.no_cache = True
     context.page_title = _("New Appointment")
     return context
@@ -30,8 +33,12 @@ def get_patient_details(patient):
 
 
 @frappe.whitelist(allow_guest=False)
-def get_available_slots(practitioner, appointment_date, appointment_type):
-    """Fetch available time slots from backend API."""
+def get_available_slots(practitioner, appointment_date, appointment_type, with_duration=False):
+    """Fetch available time slots from backend API.
+
+    With `with_duration`, returns the slots together with the service duration so the
+    form can patch its slot list in place when realtime slot events arrive.
+    """
     if not (practitioner and appointment_date and appointment_type):
         frappe.log_error("❌ Missing required parameters for get_available_slots", "New Appointment")
         return []
@@ -43,11 +50,10 @@ def get_available_slots(practitioner, appointment_date, appointment_type):
             appointment_date=appointment_date,
             appointment_type=appointment_type
         )
-        frappe.log_error(
-            message=f"✅ API Response: {frappe.as_json(response)}",
-            title="get_available_slots"
-        )
-        return response.get("available_slots", []) if response else []
+        slots = response.get("available_slots", []) if response else []
+        if frappe.utils.cint(with_duration):
+            return {"available_slots": slots, "duration_mins": (response or {}).get("duration_mins")}
+        return slots
 
     except Exception:
         frappe.log_error(frappe.get_traceback(), "Error fetching available slots (New Appointment)")
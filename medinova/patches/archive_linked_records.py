@@ -0,0 +1,6 @@
+from medinova.archive import archive_stranded_records
+
+
+def execute():
+    """Moves payments, waitlist entries and reminder logs still pointing at archived records."""
+    archive_stranded_records()
@@ -0,0 +1,33 @@
+import frappe
+
+from medinova.timeline import ENCOUNTER_CHILD_TABLES, get_child_rows
+from medinova.vitals import build_encounter_readings, insert_readings
+
+BATCH_SIZE = 500
+
+
+def execute():
+    """Builds the Vital Reading time series for encounters saved before it existed."""
+    last_name = ""
+    while True:
+        encounters = frappe.get_all(
+            "Patient Encounter",
+            filters={"name": (">", last_name), "patient": ("is", "set")},
+            fields=["name", "patient", "encounter_datetime", "creation"],
+            order_by="name asc",
+            limit=BATCH_SIZE,
+        )
+        if not encounters:
+            break
+
+        names = [e.name for e in encounters]
+        vitals = get_child_rows("Patient Encounter", names, {"vitals": ENCOUNTER_CHILD_TABLES["vitals"]})
+
+        frappe.db.delete("Vital Reading", {"encounter": ("in", names)})
+        readings = []
+        for encounter in encounters:
+            readings += build_encounter_readings(encounter, vitals[encounter.name]["vitals"])
+        insert_readings(readings)
+
+        frappe.db.commit()
+        last_name = encounters[-1].name
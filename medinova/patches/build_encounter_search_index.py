@@ -0,0 +1,6 @@
+from medinova.clinical_search import rebuild_encounter_search_index
+
+
+def execute():
+    """Indexes the notes of encounters saved before clinical search existed."""
+    rebuild_encounter_search_index()
@@ -0,0 +1,6 @@
+from medinova.patient_search import rebuild_patient_search_index
+
+
+def execute():
+    """Indexes patients created before the fuzzy search index existed."""
+    rebuild_patient_search_index()
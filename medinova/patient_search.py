@@ -0,0 +1,325 @@
+import re
+import unicodedata
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+DEFAULT_LIMIT = 20
+CANDIDATE_LIMIT = 200
+MIN_TOKEN_OVERLAP = 0.4
+# Only the rarest grams of a query are probed; a gram posted for more patients
+# than COMMON_GRAM_DF (say "  a") adds rows to aggregate but hardly ranks anyone.
+MAX_PROBE_GRAMS = 12
+COMMON_GRAM_DF = 5000
+# Hard cap on postings aggregated per query, for queries made only of common grams.
+MAX_POSTINGS = 20000
+GRAM_DF_KEY = "medinova:patient_search:gram_df"
+GRAM_DF_TTL_SECS = 24 * 60 * 60
+# Field prefixes keep name, phone, email and ID postings apart in the one token column.
+NAME, PHONE, EMAIL, PATIENT_ID = "n", "p", "e", "i"
+
+
+def normalise_text(value):
+    value = unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9@.\s]", " ", value.lower()).strip()
+
+
+def normalise_phone(value):
+    """Digits only, without the country code, so '+91 98450-12345' and '9845012345' match."""
+    digits = re.sub(r"\D", "", value or "")
+    return digits[-10:]
+
+
+def trigrams(text):
+    """pg_trgm style trigrams: each word is padded so prefixes weigh more than inner matches."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    a, b = trigrams(a), trigrams(b)
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def get_patient_tokens(patient):
+    """All postings for one Patient row (a dict with the indexed fields)."""
+    tokens = set()
+
+    name = normalise_text(patient.get("full_name"))
+    tokens.update(f"{NAME}:{g}" for g in trigrams(name))
+
+    phone = normalise_phone(patient.get("contact_number"))
+    if phone:
+        tokens.add(f"{PHONE}={phone}")
+        tokens.update(f"{PHONE}:{g}" for g in trigrams(phone))
+
+    email = (patient.get("email") or "").strip().lower()
+    if email:
+        tokens.add(f"{EMAIL}={email}")
+        tokens.update(f"{EMAIL}:{g}" for g in trigrams(normalise_text(email.split("@")[0])))
+
+    patient_id = (patient.get("patient_id") or patient.get("name") or "").strip().lower()
+    if patient_id:
+        tokens.add(f"{PATIENT_ID}={patient_id}")
+        tokens.update(f"{PATIENT_ID}:{g}" for g in trigrams(normalise_text(patient_id)))
+
+    return tokens
+
+
+def get_query_tokens(query):
+    """Exact tokens and trigram tokens to probe for a free-text query."""
+    query = (query or "").strip()
+    lowered = query.lower()
+    exact, grams = set(), set()
+
+    if "@" in lowered:
+        exact.add(f"{EMAIL}={lowered}")
+        grams.update(f"{EMAIL}:{g}" for g in trigrams(normalise_text(lowered.split("@")[0])))
+        return exact, grams
+
+    exact.add(f"{PATIENT_ID}={lowered}")
+    digits = normalise_phone(query)
+    if len(digits) >= 4 and not re.search(r"[a-z]", lowered):
+        exact.add(f"{PHONE}={digits}")
+        grams.update(f"{PHONE}:{g}" for g in trigrams(digits))
+    elif re.search(r"\d", query):
+        grams.update(f"{PATIENT_ID}:{g}" for g in trigrams(normalise_text(lowered)))
+    else:
+        grams.update(f"{NAME}:{g}" for g in trigrams(normalise_text(query)))
+
+    return exact, grams
+
+
+def index_patient(doc, method=None):
+    """Keeps the postings of one patient in sync on save."""
+    frappe.db.delete("Patient Search Token", {"patient": doc.name})
+    insert_postings({doc.name: get_patient_tokens(doc.as_dict())})
+
+
+def remove_patient(doc, method=None):
+    frappe.db.delete("Patient Search Token", {"patient": doc.name})
+
+
+def rename_patient(old, new):
+    frappe.db.set_value("Patient Search Token", {"patient": old}, "patient", new, update_modified=False)
+
+
+def insert_postings(tokens_by_patient):
+    now = now_datetime()
+    user = frappe.session.user
+    values = [
+        (frappe.generate_hash(length=12), now, now, user, user, token, patient)
+        for patient, tokens in tokens_by_patient.items()
+        for token in tokens
+    ]
+    if values:
+        frappe.db.bulk_insert(
+            "Patient Search Token",
+            fields=["name", "creation", "modified", "owner", "modified_by", "token", "patient"],
+            values=values,
+        )
+
+
+def rebuild_patient_search_index(batch_size=1000):
+    """Background job: (re)indexes every patient in keyset batches."""
+    frappe.db.delete("Patient Search Token")
+    frappe.cache.delete_value(GRAM_DF_KEY)
+    last_name = ""
+    while True:
+        patients = frappe.get_all(
+            "Patient",
+            filters={"name": (">", last_name)},
+            fields=["name", "patient_id", "full_name", "contact_number", "email"],
+            order_by="name asc",
+            limit=batch_size,
+        )
+        if not patients:
+            break
+        insert_postings({p.name: get_patient_tokens(p) for p in patients})
+        frappe.db.commit()
+        last_name = patients[-1].name
+
+
+def get_gram_frequencies(grams):
+    """
+    Number of patients posted under each gram. Counts come from a redis hash
+    that expires a day after it was started; they only steer which grams are
+    probed, so a day of drift is harmless.
+    """
+    frequencies, missing = {}, []
+    for gram in grams:
+        df = frappe.cache.hget(GRAM_DF_KEY, gram)
+        if df is None:
+            missing.append(gram)
+        else:
+            frequencies[gram] = df
+
+    if missing:
+        counted = dict(
+            frappe.db.sql(
+                """
+                SELECT token, COUNT(*)
+                FROM `tabPatient Search Token`
+                WHERE token IN %(grams)s
+                GROUP BY token
+                """,
+                {"grams": tuple(missing)},
+            )
+        )
+        for gram in missing:
+            frequencies[gram] = cint(counted.get(gram))
+            frappe.cache.hset(GRAM_DF_KEY, gram, frequencies[gram])
+        key = frappe.cache.make_key(GRAM_DF_KEY)
+        if frappe.cache.ttl(key) == -1:
+            frappe.cache.expire(key, GRAM_DF_TTL_SECS)
+
+    return frequencies
+
+
+def get_probe_grams(grams):
+    """The rarest grams, without the common ones unless nothing else is left."""
+    if not grams:
+        return set()
+
+    frequencies = get_gram_frequencies(grams)
+    ranked = sorted((g for g in grams if frequencies[g]), key=frequencies.get)
+    rare = [g for g in ranked if frequencies[g] <= COMMON_GRAM_DF]
+    return set((rare or ranked)[:MAX_PROBE_GRAMS])
+
+
+def get_candidates(exact, grams):
+    """
+    Patients sharing the most tokens with the query, straight from the postings
+    index. Exact tokens are always probed; of the grams only the rarest are.
+    """
+    grams = get_probe_grams(grams)
+    if not exact and not grams:
+        return []
+
+    min_hits = max(1, int(len(grams) * MIN_TOKEN_OVERLAP))
+    return frappe.db.sql(
+        """
+        SELECT patient, SUM(IF(token IN %(exact)s, 100, 1)) AS hits
+        FROM (
+            SELECT patient, token
+            FROM `tabPatient Search Token`
+            WHERE token IN %(exact)s
+            UNION ALL
+            (
+                SELECT patient, token
+                FROM `tabPatient Search Token`
+                WHERE token IN %(grams)s
+                LIMIT %(max_postings)s
+            )
+        ) AS postings
+        GROUP BY patient
+        HAVING hits >= %(min_hits)s
+        ORDER BY hits DESC
+        LIMIT %(limit)s
+        """,
+        {
+            "exact": tuple(exact) or ("",),
+            "grams": tuple(grams) or ("",),
+            "max_postings": MAX_POSTINGS,
+            "min_hits": min_hits,
+            "limit": CANDIDATE_LIMIT,
+        },
+        as_dict=True,
+    )
+
+
+def to_filter_list(filters):
+    """Dict or list filters as a list, so further conditions can be appended."""
+    if isinstance(filters, str):
+        filters = frappe.parse_json(filters)
+    if isinstance(filters, dict):
+        return [
+            [field, *value] if isinstance(value, (list, tuple)) else [field, "=", value]
+            for field, value in filters.items()
+        ]
+    return list(filters or [])
+
+
+def search(query, limit=DEFAULT_LIMIT, filters=None, ignore_permissions=True):
+    """
+    Ranked fuzzy search over name, phone, email and patient ID. Candidates
+    come from the trigram postings; only those are loaded and scored, through
+    `frappe.get_list` so that `filters` and (unless ignored) the session
+    user's record permissions apply.
+    """
+    exact, grams = get_query_tokens(query)
+    candidates = get_candidates(exact, grams)
+    if not candidates:
+        return []
+
+    patients = frappe.get_list(
+        "Patient",
+        filters=[*to_filter_list(filters), ["name", "in", [c.patient for c in candidates]]],
+        fields=["name", "patient_id", "full_name", "contact_number", "email"],
+        limit_page_length=0,
+        ignore_permissions=ignore_permissions,
+    )
+
+    text = normalise_text(query)
+    digits = normalise_phone(query)
+    lowered = query.strip().lower()
+    results = []
+    for patient in patients:
+        patient_tokens = get_patient_tokens(patient)
+        if patient_tokens & exact:
+            score = 1.0
+        else:
+            score = max(
+                similarity(text, normalise_text(patient.full_name)),
+                similarity(digits, normalise_phone(patient.contact_number)) if digits else 0,
+                similarity(lowered, normalise_text(patient.email)) if "@" in lowered else 0,
+                similarity(text, normalise_text(patient.patient_id or patient.name)),
+            )
+        patient["score"] = round(score, 3)
+        results.append(patient)
+
+    results.sort(key=lambda p: (-p["score"], p.full_name or ""))
+    return results[:limit]
+
+
+@frappe.whitelist()
+def search_patients(query, limit=DEFAULT_LIMIT):
+    frappe.has_permission("Patient", "read", throw=True)
+    return search(query, min(cint(limit) or DEFAULT_LIMIT, 100), ignore_permissions=False)
+
+
+def best_patient_match(query, min_score=0.85):
+    """
+    The single confident match for a free-text patient name, phone or email: the
+    only patient scoring at least `min_score` (an exact phone, email or ID hit
+    scores 1.0). None when no patient or more than one qualifies.
+    """
+    results = [p for p in search(query, limit=2) if p["score"] >= min_score]
+    if len(results) != 1:
+        return None
+    return results[0].name
+
+
+@frappe.whitelist()
+@frappe.validate_and_sanitize_search_inputs
+def patient_query(doctype, txt, searchfield, start, page_len, filters):
+    """Link-field search for Patient backed by the fuzzy index instead of LIKE scans."""
+    frappe.has_permission("Patient", "read", throw=True)
+    if not txt:
+        return frappe.get_list(
+            "Patient",
+            filters=filters,
+            fields=["name", "full_name", "contact_number"],
+            order_by="modified desc",
+            limit_start=start,
+            limit_page_length=page_len,
+            as_list=True,
+        )
+
+    results = search(txt, cint(start) + cint(page_len), filters, ignore_permissions=False)[cint(start) :]
+    return [(p.name, p.full_name, p.contact_number) for p in results]
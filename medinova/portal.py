@@ -0,0 +1,175 @@
+import hashlib
+import json
+import time
+
+import frappe
+from frappe.utils import cint, nowdate
+from werkzeug.wrappers import Response
+
+from medinova.archive import union_table
+
+CATALOG_VERSION_KEY = "medinova:portal_version:catalog"
+USER_VERSION_KEY = "medinova:portal_version:user:{}"
+PAYLOAD_TTL_SECS = 24 * 60 * 60
+CATALOG_MAX_AGE_SECS = 300
+
+PATIENT_USER_FIELDS = ["linked_user", "email", "owner"]
+APPOINTMENT_FIELDS = [
+    "name", "patient", "practitioner", "appointment_type", "appointment_date",
+    "start_time", "end_time", "status", "payment_status",
+]
+
+
+def seed_version(redis_key):
+    """
+    A missing counter (new, or lost with a redis restart or eviction) starts at
+    the current time in microseconds rather than 0, above anything it counted
+    up to before, so it never hands out an ETag that a browser may still hold.
+    """
+    frappe.cache.set(redis_key, time.time_ns() // 1000, nx=True)
+
+
+def get_version(key):
+    redis_key = frappe.cache.make_key(key)
+    version = frappe.cache.get(redis_key)
+    if version is None:
+        seed_version(redis_key)
+        version = frappe.cache.get(redis_key)
+    return cint(version)
+
+
+def bump_versions(keys):
+    """Bumped now and again after commit, so a response built from the uncommitted state is not reused."""
+    keys = {k for k in keys if k}
+    if not keys:
+        return
+
+    def bump():
+        for key in keys:
+            redis_key = frappe.cache.make_key(key)
+            seed_version(redis_key)
+            frappe.cache.incr(redis_key)
+
+    bump()
+    frappe.db.after_commit.add(bump)
+
+
+def get_patient_users(patients):
+    """Portal users that can see a patient: the linked user, the patient's email and its owner."""
+    patients = [p for p in patients if p]
+    if not patients:
+        return set()
+    rows = frappe.get_all("Patient", filters={"name": ("in", patients)}, fields=PATIENT_USER_FIELDS)
+    return {row[field] for row in rows for field in PATIENT_USER_FIELDS if row[field]}
+
+
+def get_user_patients(user):
+    """The patients `user` can see on the portal, by the same rule as get_patient_users."""
+    if not user or user == "Guest":
+        return []
+    return frappe.get_all("Patient", or_filters={field: user for field in PATIENT_USER_FIELDS}, pluck="name")
+
+
+def is_patient_user(patient, user=None):
+    user = user or frappe.session.user
+    return user != "Guest" and user in get_patient_users([patient])
+
+
+def bump_appointment_users(doc, method=None):
+    before = doc.get_doc_before_save()
+    users = get_patient_users([doc.patient, before and before.patient])
+    users.update(u for u in (doc.email, before and before.email) if u)
+    bump_versions(USER_VERSION_KEY.format(user) for user in users)
+
+
+def bump_patient_users(doc, method=None):
+    before = doc.get_doc_before_save()
+    users = {doc.get(field) for field in PATIENT_USER_FIELDS}
+    if before:
+        users.update(before.get(field) for field in PATIENT_USER_FIELDS)
+    bump_versions(USER_VERSION_KEY.format(user) for user in users if user)
+
+
+def bump_catalog(doc=None, method=None):
+    bump_versions([CATALOG_VERSION_KEY])
+
+
+def make_etag(*parts):
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def conditional_response(etag, build, cache_control):
+    """
+    304 when the client already holds `etag`. Otherwise the JSON body comes from
+    redis when another request (or device) built it already, else from `build`.
+    """
+    headers = {"ETag": f'"{etag}"', "Cache-Control": cache_control}
+    if cache_control.startswith("private"):
+        headers["Vary"] = "Cookie"
+    if frappe.request and frappe.request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+
+    key = f"medinova:portal_payload:{etag}"
+    body = frappe.cache.get_value(key)
+    if body is None:
+        body = json.dumps({"message": build()}, default=str, separators=(",", ":"))
+        frappe.cache.set_value(key, body, expires_in_sec=PAYLOAD_TTL_SECS)
+    return Response(body, status=200, headers=headers, content_type="application/json")
+
+
+def get_user_appointments(user, upcoming):
+    patients = get_user_patients(user)
+    if not patients:
+        return []
+
+    return frappe.db.sql(
+        f"""
+        SELECT app.*, prac.full_name AS practitioner_name
+        FROM {union_table("Make Appointment", APPOINTMENT_FIELDS)} AS app
+        LEFT JOIN `tabPractitioner` AS prac ON prac.name = app.practitioner
+        WHERE app.patient IN %(patients)s
+            {"AND app.appointment_date >= %(today)s AND app.status != 'Cancelled'" if upcoming else ""}
+        ORDER BY app.appointment_date {"ASC" if upcoming else "DESC"}, app.start_time
+        """,
+        {"patients": tuple(patients), "today": nowdate()},
+        as_dict=True,
+    )
+
+
+@frappe.whitelist()
+def my_appointments(upcoming=0):
+    """
+    The signed-in patient's appointments (or only upcoming ones). The ETag is the
+    user's version counter, so an unchanged list costs one redis read and a 304.
+    """
+    user = frappe.session.user
+    if user == "Guest":
+        frappe.throw("Please log in to view your appointments.", frappe.PermissionError)
+
+    upcoming = cint(upcoming)
+    version = get_version(USER_VERSION_KEY.format(user))
+    # "Upcoming" also changes at midnight without any write.
+    etag = make_etag("appointments", user, version, upcoming, nowdate() if upcoming else "")
+    return conditional_response(etag, lambda: get_user_appointments(user, upcoming), "private, no-cache")
+
+
+def get_catalog():
+    return {
+        "practitioners": frappe.get_all(
+            "Practitioner",
+            fields=["name", "title", "full_name", "specialization", "consultation_fee", "photo"],
+            order_by="full_name asc",
+        ),
+        "appointment_types": frappe.get_all(
+            "Appointment Type",
+            fields=["name", "type_name", "price", "default_duration_mins"],
+            order_by="type_name asc",
+        ),
+    }
+
+
+@frappe.whitelist(allow_guest=True)
+def booking_catalog():
+    """Practitioners and appointment types for the booking form, cacheable by browsers and proxies."""
+    etag = make_etag("catalog", get_version(CATALOG_VERSION_KEY))
+    return conditional_response(etag, get_catalog, f"public, max-age={CATALOG_MAX_AGE_SECS}")
@@ -0,0 +1,41 @@
+// Copyright (c) 2025, chai and contributors
+// For license information, please see license.txt
+
+// Realtime slot invalidation shared by the Make Appointment form, the
+// new-appointment web form and the AI Booking page. The server publishes
+// `medinova_slots:<practitioner>:<date>` whenever a booking is created,
+// moved or cancelled; listeners patch their slot list instead of polling.
+// Portal users get a copy tagged `source: "portal"` on the website room;
+// desk sockets receive both copies, so desk listeners ignore that one.
+
+frappe.provide("medinova.slots");
+
+medinova.slots.channel = function (practitioner, appointment_date) {
+	return `medinova_slots:${practitioner}:${appointment_date}`;
+};
+
+medinova.slots.subscribe = function (practitioner, appointment_date, handler) {
+	if (!(frappe.realtime && practitioner && appointment_date)) {
+		return () => {};
+	}
+	const event = medinova.slots.channel(practitioner, appointment_date);
+	frappe.realtime.on(event, handler);
+	return () => frappe.realtime.off(event, handler);
+};
+
+medinova.slots.to_minutes = function (time) {
+	const [hours, minutes] = String(time).split(":").map(Number);
+	return hours * 60 + (minutes || 0);
+};
+
+// Drops every start time whose [start, start + duration) overlaps the booked interval.
+medinova.slots.remove_overlapping = function (slots, duration_mins, start_time, end_time) {
+	const booked_start = medinova.slots.to_minutes(start_time);
+	const booked_end = medinova.slots.to_minutes(end_time);
+	const duration = parseInt(duration_mins, 10) || 0;
+
+	return slots.filter((slot) => {
+		const start = medinova.slots.to_minutes(slot);
+		return start + duration <= booked_start || start >= booked_end;
+	});
+};
@@ -0,0 +1,286 @@
+import time
+from abc import ABC, abstractmethod
+
+import frappe
+from frappe.utils import add_days, getdate, now_datetime, strip_html
+from frappe.utils.jinja import get_jenv
+from frappe.utils.safe_exec import get_safe_globals
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_RATE_PER_SEC = 20
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECS = 2
+
+DEFAULT_SUBJECT = "Reminder: Your Appointment Tomorrow is scheduled"
+DEFAULT_MESSAGE = (
+    "<p>Dear {{ doc.patient }},</p>"
+    "<p>This is a friendly reminder for your upcoming appointment with <b>{{ doc.practitioner }}</b> "
+    "on {{ frappe.utils.formatdate(doc.appointment_date) }} at {{ doc.start_time }}.</p>"
+)
+
+
+class ReminderGateway(ABC):
+    """
+    Transport for reminder batches. `send_email` and `send_sms` receive a list of
+    messages and return the list of errors (None for each message that went out).
+    """
+
+    @abstractmethod
+    def send_email(self, messages):
+        ...
+
+    @abstractmethod
+    def send_sms(self, messages):
+        ...
+
+
+class FrappeGateway(ReminderGateway):
+    """Default gateway: Frappe's email queue and the SMS Settings provider."""
+
+    def send_email(self, messages):
+        errors = []
+        for message in messages:
+            try:
+                frappe.sendmail(
+                    recipients=[message.recipient],
+                    subject=message.subject,
+                    message=message.body,
+                    reference_doctype="Make Appointment",
+                    reference_name=message.appointment,
+                )
+                errors.append(None)
+            except Exception as e:
+                errors.append(str(e))
+        return errors
+
+    def send_sms(self, messages):
+        from frappe.core.doctype.sms_settings.sms_settings import send_sms
+
+        errors = []
+        for message in messages:
+            try:
+                send_sms([message.recipient], message.body, success_msg=False)
+                errors.append(None)
+            except Exception as e:
+                errors.append(str(e))
+        return errors
+
+
+class StubGateway(ReminderGateway):
+    """Local gateway for tests: records messages instead of sending them."""
+
+    def __init__(self, fail_first=0):
+        self.sent = []
+        self.fail_first = fail_first
+
+    def _send(self, channel, messages):
+        errors = []
+        for message in messages:
+            if self.fail_first:
+                self.fail_first -= 1
+                errors.append("stub failure")
+                continue
+            self.sent.append((channel, message))
+            errors.append(None)
+        return errors
+
+    def send_email(self, messages):
+        return self._send("Email", messages)
+
+    def send_sms(self, messages):
+        return self._send("SMS", messages)
+
+
+class RateLimiter:
+    """Simple token bucket so a large run does not flood the mail or SMS provider."""
+
+    def __init__(self, rate_per_sec):
+        self.rate = float(rate_per_sec)
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+
+    def acquire(self, count):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= min(count, self.rate):
+                self.tokens -= count
+                return
+            time.sleep((min(count, self.rate) - self.tokens) / self.rate)
+
+
+def get_gateway():
+    path = frappe.conf.get("medinova_reminder_gateway") or (frappe.get_hooks("medinova_reminder_gateway") or [None])[-1]
+    if path:
+        return frappe.get_attr(path)()
+    return FrappeGateway()
+
+
+def dispatch_reminders():
+    """
+    Scheduled hourly: queues tomorrow's reminder run as a single background job.
+    The Reminder Log makes each rerun send only what is still due, so
+    appointments booked later in the day for tomorrow are reminded as well.
+    """
+    reminder_date = add_days(getdate(), 1)
+    frappe.enqueue(
+        "medinova.reminders.send_appointment_reminders",
+        queue="long",
+        job_id=f"medinova_reminders::{reminder_date}",
+        deduplicate=True,
+        reminder_date=str(reminder_date),
+    )
+
+
+def get_due_reminders(reminder_date):
+    """
+    Tomorrow's appointments and the channels not yet reminded, in one query on
+    the (appointment_date, status) index joined to the dedupe ledger.
+    """
+    return frappe.db.sql(
+        """
+        SELECT
+            app.name, app.patient, app.practitioner, app.appointment_date,
+            app.start_time, app.end_time, app.appointment_type, app.status,
+            pat.full_name AS patient_name,
+            COALESCE(NULLIF(app.email, ''), pat.email) AS email,
+            COALESCE(NULLIF(app.patient_contact, ''), pat.contact_number) AS phone,
+            email_log.name AS email_sent,
+            sms_log.name AS sms_sent
+        FROM `tabMake Appointment` AS app
+        LEFT JOIN `tabPatient` AS pat ON pat.name = app.patient
+        LEFT JOIN `tabReminder Log` AS email_log
+            ON email_log.appointment = app.name AND email_log.channel = 'Email'
+            AND email_log.reminder_date = app.appointment_date
+        LEFT JOIN `tabReminder Log` AS sms_log
+            ON sms_log.appointment = app.name AND sms_log.channel = 'SMS'
+            AND sms_log.reminder_date = app.appointment_date
+        WHERE app.appointment_date = %(reminder_date)s
+            AND app.status IN ('Booked', 'Confirmed')
+            AND (email_log.name IS NULL OR sms_log.name IS NULL)
+        ORDER BY app.name
+        """,
+        {"reminder_date": reminder_date},
+        as_dict=True,
+    )
+
+
+def get_templates():
+    """Compiles the Booking Reminder / Booking SMS notification templates once per run."""
+    jenv = get_jenv()
+    reminder = frappe.db.get_value("Notification", "Booking Reminder", ["subject", "message"], as_dict=True) or {}
+    sms = frappe.db.get_value("Notification", "Booking SMS", "message") or reminder.get("message")
+
+    return frappe._dict(
+        subject=jenv.from_string(reminder.get("subject") or DEFAULT_SUBJECT),
+        email=jenv.from_string(reminder.get("message") or DEFAULT_MESSAGE),
+        sms=jenv.from_string(sms or DEFAULT_MESSAGE),
+    )
+
+
+def build_messages(rows, templates):
+    context = get_safe_globals()
+    messages = {"Email": [], "SMS": []}
+
+    for row in rows:
+        context["doc"] = row
+        if row.email and not row.email_sent:
+            messages["Email"].append(
+                frappe._dict(
+                    appointment=row.name,
+                    recipient=row.email,
+                    subject=templates.subject.render(context),
+                    body=templates.email.render(context),
+                )
+            )
+        if row.phone and not row.sms_sent:
+            messages["SMS"].append(
+                frappe._dict(
+                    appointment=row.name,
+                    recipient=row.phone,
+                    body=strip_html(templates.sms.render(context)).strip(),
+                )
+            )
+
+    return messages
+
+
+def send_with_retries(send, batch):
+    """Sends a batch, retrying only the failed messages with exponential backoff."""
+    pending = batch
+    sent = []
+    for attempt in range(MAX_ATTEMPTS):
+        errors = list(send(pending) or [])[: len(pending)]
+        # A gateway that returns fewer results than messages did not confirm the rest.
+        errors += ["no result from gateway"] * (len(pending) - len(errors))
+        failed = []
+        for message, error in zip(pending, errors, strict=True):
+            if error:
+                message.error = error
+                failed.append(message)
+            else:
+                sent.append(message)
+        pending = failed
+        if not pending:
+            break
+        if attempt < MAX_ATTEMPTS - 1:
+            time.sleep(RETRY_BACKOFF_SECS * 2**attempt)
+
+    for message in pending:
+        frappe.log_error(
+            f"Reminder to {message.recipient} for {message.appointment} failed: {message.error}",
+            "Medinova Reminder Error",
+        )
+    return sent
+
+
+def record_sent(channel, reminder_date, messages):
+    if not messages:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        "Reminder Log",
+        fields=[
+            "name", "creation", "modified", "owner", "modified_by",
+            "appointment", "channel", "reminder_date", "recipient", "sent_at",
+        ],
+        values=[
+            (
+                frappe.generate_hash(length=12), now, now, user, user,
+                m.appointment, channel, reminder_date, m.recipient, now,
+            )
+            for m in messages
+        ],
+        ignore_duplicates=True,
+    )
+
+
+def send_appointment_reminders(reminder_date=None, gateway=None):
+    """
+    Background job: renders and sends every reminder due for `reminder_date`
+    (tomorrow by default) in rate-limited batches. Each batch is written to the
+    Reminder Log and committed, so a rerun only picks up what is left.
+    """
+    reminder_date = str(getdate(reminder_date) if reminder_date else add_days(getdate(), 1))
+    gateway = gateway or get_gateway()
+    batch_size = int(frappe.conf.get("medinova_reminder_batch_size") or DEFAULT_BATCH_SIZE)
+    limiter = RateLimiter(frappe.conf.get("medinova_reminder_rate_per_sec") or DEFAULT_RATE_PER_SEC)
+
+    messages = build_messages(get_due_reminders(reminder_date), get_templates())
+    senders = {"Email": gateway.send_email, "SMS": gateway.send_sms}
+    summary = {}
+
+    for channel, channel_messages in messages.items():
+        summary[channel] = 0
+        for start in range(0, len(channel_messages), batch_size):
+            batch = channel_messages[start : start + batch_size]
+            limiter.acquire(len(batch))
+            sent = send_with_retries(senders[channel], batch)
+            record_sent(channel, reminder_date, sent)
+            frappe.db.commit()
+            summary[channel] += len(sent)
+
+    return summary
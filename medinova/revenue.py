@@ -0,0 +1,283 @@
+import frappe
+import numpy as np
+from frappe.utils import add_days, date_diff, flt, getdate, today
+
+from medinova.archive import archive_exists, get_all_with_archive, get_tables, union_table
+
+CACHE_KEY = "medinova:revenue_reconciliation"
+CACHE_TTL_SECS = 24 * 60 * 60
+TOLERANCE = 0.005
+GROUP_KEYS = {
+    "Day, Practitioner and Mode": ("day", "practitioner", "mode_of_payment"),
+    "Practitioner": ("practitioner",),
+    "Mode of Payment": ("mode_of_payment",),
+    "Day": ("day",),
+}
+
+ENCOUNTER_FIELDS = ["name", "encounter_datetime", "patient", "practitioner", "appointment", "grand_total", "payment_status"]
+
+# Why a settled-looking encounter does not reconcile; NULL when it does.
+MISMATCH_REASON = f"""
+    CASE
+        WHEN paid > billed + {TOLERANCE} THEN 'Overpaid'
+        WHEN payment_status = 'Paid' AND paid < billed - {TOLERANCE} THEN 'Marked paid but underpaid'
+        WHEN IFNULL(payment_status, '') != 'Paid' AND billed > 0 AND paid >= billed - {TOLERANCE}
+            THEN 'Paid but not marked paid'
+        WHEN appointment_payment_status = 'Paid' AND paid < billed - {TOLERANCE}
+            THEN 'Appointment marked paid but underpaid'
+        WHEN appointment_payment_status IN ('Pending', 'Partially Paid') AND billed > 0 AND paid >= billed - {TOLERANCE}
+            THEN 'Appointment not marked paid'
+    END
+"""
+
+
+def appointment_payment_status_sql():
+    """Primary-key lookups into hot (then archived) appointments, cheaper than joining a UNION."""
+    tables = ["Make Appointment"]
+    if archive_exists("Make Appointment"):
+        tables.append("Make Appointment Archive")
+    lookups = ", ".join(f"(SELECT payment_status FROM `tab{t}` WHERE name = enc.appointment)" for t in tables)
+    return f"COALESCE({lookups})"
+
+
+def payment_totals_sql(conditions):
+    """
+    Paid amount and lowest / highest payment mode per encounter matching
+    `conditions`. Each payment table is grouped on its own, restricted by a
+    semi-join to the encounters in range of each encounter table (a payment
+    normally sits in the same one as its encounter, but one stranded by an old
+    archive run need not), so only those encounters' payments are read.
+    """
+    branches = [
+        f"""
+        SELECT
+            pay.patient_encounter,
+            SUM(pay.amount_paid) AS paid,
+            MIN(pay.mode_of_payment) AS first_mode,
+            MAX(pay.mode_of_payment) AS last_mode
+        FROM `{payments}` AS pay
+        WHERE pay.docstatus != 2
+            AND pay.patient_encounter IN (SELECT enc.name FROM `{encounters}` AS enc WHERE {conditions})
+        GROUP BY pay.patient_encounter
+        """
+        for payments in get_tables("Encounter Payment")
+        for encounters in get_tables("Patient Encounter")
+    ]
+    return f"""
+        SELECT
+            patient_encounter,
+            SUM(paid) AS paid,
+            MIN(first_mode) AS first_mode,
+            MAX(last_mode) AS last_mode
+        FROM ({" UNION ALL ".join(branches)}) AS by_table
+        GROUP BY patient_encounter
+    """
+
+
+def encounter_totals_sql(conditions):
+    """
+    One row per encounter: billed grand total against the sum of its
+    non-cancelled payments. Encounter Payment is not submittable, so
+    `docstatus != 2` keeps drafts (how payments are recorded today) and
+    excludes only cancelled ones.
+    """
+    return f"""
+        SELECT
+            enc.name AS encounter,
+            DATE(enc.encounter_datetime) AS day,
+            enc.patient,
+            enc.practitioner,
+            enc.appointment,
+            IFNULL(enc.grand_total, 0) AS billed,
+            enc.payment_status,
+            {appointment_payment_status_sql()} AS appointment_payment_status,
+            IFNULL(pay.paid, 0) AS paid,
+            CASE
+                WHEN pay.first_mode IS NULL THEN 'Unpaid'
+                WHEN pay.first_mode = pay.last_mode THEN pay.first_mode
+                ELSE 'Mixed'
+            END AS mode_of_payment
+        FROM {union_table("Patient Encounter", ENCOUNTER_FIELDS)} AS enc
+        LEFT JOIN ({payment_totals_sql(conditions)}) AS pay ON pay.patient_encounter = enc.name
+        WHERE {conditions}
+    """
+
+
+def get_day_totals(from_date, to_date):
+    """Billed, paid and mismatch counts per day, practitioner and payment mode, grouped in SQL."""
+    rows = frappe.db.sql(
+        f"""
+        SELECT
+            day, practitioner, mode_of_payment,
+            COUNT(*) AS encounters,
+            SUM(billed) AS billed,
+            SUM(paid) AS paid,
+            SUM(({MISMATCH_REASON}) IS NOT NULL) AS mismatches
+        FROM ({encounter_totals_sql("enc.encounter_datetime >= %(from)s AND enc.encounter_datetime < %(to)s")}) t
+        GROUP BY day, practitioner, mode_of_payment
+        """,
+        {"from": getdate(from_date), "to": add_days(getdate(to_date), 1)},
+        as_dict=True,
+    )
+    for row in rows:
+        row.update(
+            day=str(row.day),
+            billed=flt(row.billed),
+            paid=flt(row.paid),
+            encounters=int(row.encounters),
+            mismatches=int(row.mismatches),
+        )
+    return rows
+
+
+def get_cached_totals(from_date, to_date):
+    """
+    Day totals for a range. Closed days (before today) come from a per-day redis
+    hash entry; only the missing span is queried, and today is always live.
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    days = [add_days(from_date, i) for i in range(date_diff(to_date, from_date) + 1)]
+    closed_before = getdate(today())
+
+    rows, missing = [], []
+    for day in days:
+        cached = frappe.cache.hget(CACHE_KEY, str(day)) if day < closed_before else None
+        if cached is None:
+            missing.append(day)
+        else:
+            rows.extend(cached)
+
+    if missing:
+        fresh = get_day_totals(missing[0], missing[-1])
+        by_day = {str(day): [] for day in missing}
+        for row in fresh:
+            if row.day in by_day:
+                by_day[row.day].append(row)
+        for day in missing:
+            rows.extend(by_day[str(day)])
+            if day < closed_before:
+                frappe.cache.hset(CACHE_KEY, str(day), by_day[str(day)])
+        set_cache_expiry()
+
+    return rows
+
+
+def set_cache_expiry():
+    """
+    The hash expires a fixed time after its first entry was written (later
+    writes do not extend it), which bounds how long an entry a missed
+    invalidation left behind can be served.
+    """
+    key = frappe.cache.make_key(CACHE_KEY)
+    if frappe.cache.ttl(key) == -1:
+        frappe.cache.expire(key, CACHE_TTL_SECS)
+
+
+def aggregate(rows, keys):
+    """Rolls day rows up to `keys` with one bincount per measure."""
+    if not rows:
+        return []
+
+    labels = np.array(["\x1f".join(str(row[k] or "") for k in keys) for row in rows])
+    groups, inverse = np.unique(labels, return_inverse=True)
+    measures = {
+        m: np.bincount(inverse, weights=np.array([row[m] for row in rows], dtype=float), minlength=len(groups))
+        for m in ("encounters", "billed", "paid", "mismatches")
+    }
+
+    billed, paid = measures["billed"], measures["paid"]
+    outstanding = billed - paid
+    collected_pct = np.divide(paid * 100, billed, out=np.zeros_like(paid), where=billed > 0)
+
+    result = []
+    for i, label in enumerate(groups):
+        row = {key: value or None for key, value in zip(keys, str(label).split("\x1f"), strict=True)}
+        row.update(
+            encounters=int(measures["encounters"][i]),
+            billed=round(float(billed[i]), 2),
+            paid=round(float(paid[i]), 2),
+            outstanding=round(float(outstanding[i]), 2),
+            collected_pct=round(float(collected_pct[i]), 1),
+            mismatches=int(measures["mismatches"][i]),
+        )
+        result.append(row)
+    return result
+
+
+def get_reconciliation(from_date, to_date, practitioner=None, mode_of_payment=None, group_by=None):
+    keys = GROUP_KEYS.get(group_by) or GROUP_KEYS["Day, Practitioner and Mode"]
+    rows = [
+        row
+        for row in get_cached_totals(from_date, to_date)
+        if (not practitioner or row["practitioner"] == practitioner)
+        and (not mode_of_payment or row["mode_of_payment"] == mode_of_payment)
+    ]
+    return sorted(aggregate(rows, keys), key=lambda row: tuple(row[k] or "" for k in keys))
+
+
+def get_mismatches(from_date, to_date, practitioner=None, mode_of_payment=None):
+    """Encounters whose payments, encounter status and appointment status disagree."""
+    conditions = "enc.encounter_datetime >= %(from)s AND enc.encounter_datetime < %(to)s"
+    if practitioner:
+        conditions += " AND enc.practitioner = %(practitioner)s"
+    rows = frappe.db.sql(
+        f"""
+        SELECT *, ({MISMATCH_REASON}) AS reason, billed - paid AS outstanding
+        FROM ({encounter_totals_sql(conditions)}) t
+        WHERE ({MISMATCH_REASON}) IS NOT NULL
+            {"AND mode_of_payment = %(mode_of_payment)s" if mode_of_payment else ""}
+        ORDER BY day, practitioner, encounter
+        """,
+        {
+            "from": getdate(from_date),
+            "to": add_days(getdate(to_date), 1),
+            "practitioner": practitioner,
+            "mode_of_payment": mode_of_payment,
+        },
+        as_dict=True,
+    )
+    return rows
+
+
+def invalidate_days(days):
+    """Dropped now and again after commit, so totals cached mid-transaction are not kept."""
+    days = {str(getdate(d)) for d in days if d}
+    if not days:
+        return
+
+    def clear():
+        for day in days:
+            frappe.cache.hdel(CACHE_KEY, day)
+
+    clear()
+    frappe.db.after_commit.add(clear)
+
+
+def get_encounter_days(encounters):
+    encounters = [e for e in encounters if e]
+    if not encounters:
+        return []
+    return [
+        e.encounter_datetime
+        for e in get_all_with_archive(
+            "Patient Encounter", filters={"name": ("in", encounters)}, fields=["encounter_datetime"]
+        )
+    ]
+
+
+def invalidate_encounter(doc, method=None):
+    before = doc.get_doc_before_save()
+    invalidate_days([doc.encounter_datetime, before and before.encounter_datetime])
+
+
+def invalidate_payment(doc, method=None):
+    before = doc.get_doc_before_save()
+    invalidate_days(get_encounter_days([doc.patient_encounter, before and before.patient_encounter]))
+
+
+def invalidate_appointment(doc, method=None):
+    if method != "on_trash" and not doc.has_value_changed("payment_status"):
+        return
+    invalidate_days(
+        frappe.get_all("Patient Encounter", filters={"appointment": doc.name}, pluck="encounter_datetime")
+    )
@@ -0,0 +1,157 @@
+import time
+
+import frappe
+from frappe.utils import cint, getdate
+
+from medinova.waitlist import get_released_slots, to_time_str
+
+SLOT_CACHE_TTL_SECS = 30
+SLOT_LOCK_TTL_SECS = 10
+SLOT_WAIT_SECS = 3
+SLOT_POLL_SECS = 0.05
+
+
+def get_slot_channel(practitioner, appointment_date):
+    """Realtime event name that open booking forms for this practitioner and day listen on."""
+    return f"medinova_slots:{practitioner}:{getdate(appointment_date)}"
+
+
+def get_booked_slot(doc):
+    """Returns the slot a Make Appointment change newly occupies, if any."""
+    if doc.status == "Cancelled" or not all([doc.practitioner, doc.appointment_date, doc.start_time, doc.end_time]):
+        return None
+
+    previous = doc.get_doc_before_save()
+    unchanged = (
+        previous
+        and previous.status != "Cancelled"
+        and previous.practitioner == doc.practitioner
+        and getdate(previous.appointment_date) == getdate(doc.appointment_date)
+        and to_time_str(previous.start_time) == to_time_str(doc.start_time)
+        and to_time_str(previous.end_time) == to_time_str(doc.end_time)
+    )
+    if unchanged:
+        return None
+
+    return {
+        "practitioner": doc.practitioner,
+        "appointment_date": str(getdate(doc.appointment_date)),
+        "start_time": to_time_str(doc.start_time),
+        "end_time": to_time_str(doc.end_time),
+    }
+
+
+def get_slot_changes(doc, method=None):
+    changes = [dict(slot, action="released") for slot in get_released_slots(doc, method)]
+
+    if method != "on_trash":
+        booked = get_booked_slot(doc)
+        if booked:
+            changes.append(dict(booked, action="booked"))
+
+    return [c for c in changes if c["practitioner"] and c["appointment_date"] and c["start_time"]]
+
+
+def get_slots_version_key(practitioner, appointment_date):
+    return frappe.cache.make_key(f"medinova:slots_version:{practitioner}:{getdate(appointment_date)}")
+
+
+def get_slots_version(practitioner, appointment_date):
+    return cint(frappe.cache.get(get_slots_version_key(practitioner, appointment_date)))
+
+
+def bump_slots_versions(keys):
+    for practitioner, appointment_date in keys:
+        frappe.cache.incr(get_slots_version_key(practitioner, appointment_date))
+
+
+def invalidate_cached_slots(keys):
+    """
+    Retires every cached slot list of these (practitioner, date) pairs, whatever
+    the appointment type, by moving them to a new version. Bumped again after
+    commit so a lookup that raced the uncommitted booking is not served either.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    bump_slots_versions(keys)
+    frappe.db.after_commit.add(lambda: bump_slots_versions(keys))
+
+
+def get_cached_start_times(practitioner, appointment_date, appointment_type, compute):
+    """
+    Short-TTL cache for slot lookups with single-flight: on a miss one worker
+    takes a lock and computes, while concurrent identical requests poll for its
+    result instead of hitting the database themselves.
+    """
+    appointment_date = getdate(appointment_date)
+    version = get_slots_version(practitioner, appointment_date)
+    key = f"medinova:slots:{practitioner}:{appointment_date}:{version}:{appointment_type}"
+
+    # expires=True skips the per-request local cache, which would pin a miss while polling.
+    cached = frappe.cache.get_value(key, expires=True)
+    if cached is not None:
+        return cached
+
+    ttl = cint(frappe.conf.get("medinova_slot_cache_ttl")) or SLOT_CACHE_TTL_SECS
+    lock = f"{key}:lock"
+    if frappe.cache.set(frappe.cache.make_key(lock), 1, nx=True, ex=SLOT_LOCK_TTL_SECS):
+        try:
+            result = compute()
+            frappe.cache.set_value(key, result, expires_in_sec=ttl)
+            return result
+        finally:
+            frappe.cache.delete_value(lock)
+
+    deadline = time.monotonic() + SLOT_WAIT_SECS
+    while time.monotonic() < deadline:
+        time.sleep(SLOT_POLL_SECS)
+        cached = frappe.cache.get_value(key, expires=True)
+        if cached is not None:
+            return cached
+        if not frappe.cache.exists(lock):
+            break
+    # The computing worker failed or is too slow; don't make this request wait on it.
+    return compute()
+
+
+def publish_slot_change(change, appointment=None):
+    """Sends one booked / released event for a (practitioner, date) interval after commit."""
+    channel = get_slot_channel(change["practitioner"], change["appointment_date"])
+    slot = {
+        "action": change["action"],
+        "practitioner": change["practitioner"],
+        "appointment_date": change["appointment_date"],
+        "start_time": change["start_time"],
+        "end_time": change["end_time"],
+    }
+    # Desk sessions listen on the site room and get the appointment name, so an
+    # open form can ignore its own save. Every logged-in portal user shares the
+    # website room, so they only learn that the interval was taken or freed.
+    # Desk sockets are in the website room too and skip that copy by its source.
+    frappe.publish_realtime(channel, dict(slot, appointment=appointment), after_commit=True)
+    frappe.publish_realtime(
+        channel, dict(slot, source="portal"), room=frappe.realtime.get_website_room(), after_commit=True
+    )
+
+
+def publish_slot_changes(doc, method=None):
+    """
+    Pushes slot-change events to every open desk form, web form and AI Booking
+    page watching the affected (practitioner, date), once the booking commits,
+    and retires the cached slot lists of those days.
+    """
+    changes = get_slot_changes(doc, method)
+    invalidate_cached_slots((c["practitioner"], c["appointment_date"]) for c in changes)
+
+    for change in changes:
+        publish_slot_change(change, doc.name)
+
+
+def publish_hold_change(slot, action):
+    """A waitlist hold takes its slot off the booking forms ("booked"); releasing it gives it back."""
+    if not (slot.get("practitioner") and slot.get("appointment_date") and slot.get("start_time")):
+        return
+    change = dict(slot, appointment_date=str(getdate(slot["appointment_date"])), action=action)
+    invalidate_cached_slots([(change["practitioner"], change["appointment_date"])])
+    publish_slot_change(change)
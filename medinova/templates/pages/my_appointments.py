@@ -0,0 +1,14 @@
+import frappe
+from frappe import _
+
+no_cache = 1
+
+
+def get_context(context):
+    """Portal page listing the signed-in patient's appointments from medinova.portal.my_appointments."""
+    if frappe.session.user == "Guest":
+        frappe.throw(_("Please log in to view your appointments."), frappe.PermissionError)
+
+    context.show_sidebar = True
+    context.title = _("My Appointments")
+    return context
@@ -0,0 +1,102 @@
+import frappe
+from frappe.utils import cint
+
+from medinova.archive import get_all_with_archive
+from medinova.portal import is_patient_user
+
+DEFAULT_PAGE_LENGTH = 20
+MAX_PAGE_LENGTH = 100
+
+ENCOUNTER_FIELDS = [
+    "name",
+    "encounter_datetime",
+    "practitioner",
+    "appointment",
+    "chief_complaint",
+    "ai_summary",
+    "follow_up_date",
+    "grand_total",
+    "payment_status",
+]
+
+# parentfield -> (child doctype, fields returned in the timeline)
+ENCOUNTER_CHILD_TABLES = {
+    "vitals": ("Vitals", ["vital_name", "value", "units", "measured_at"]),
+    "prescriptions": ("Prescription", ["medicine", "dose", "frequency", "duration_days", "instructions"]),
+    "services_performed": ("Performed Service", ["service_item", "cost"]),
+}
+
+
+def get_child_rows(parent_doctype, parents, child_tables):
+    """
+    Loads the child tables of many parents with one `parent IN (...)` query per
+    child doctype, instead of one query per parent per table as `frappe.get_doc` does.
+    Returns {parent: {parentfield: [rows]}}.
+    """
+    grouped = {parent: {parentfield: [] for parentfield in child_tables} for parent in parents}
+    if not parents:
+        return grouped
+
+    for parentfield, (child_doctype, fields) in child_tables.items():
+        rows = get_all_with_archive(
+            child_doctype,
+            filters={"parenttype": parent_doctype, "parentfield": parentfield, "parent": ("in", parents)},
+            fields=["parent", "idx", *fields],
+            order_by="parent asc, idx asc",
+        )
+        for row in rows:
+            del row["idx"]
+            grouped[row.pop("parent")][parentfield].append(row)
+
+    return grouped
+
+
+def check_patient_access(patient):
+    """Desk users need read access on the Patient; portal users may only read their own record."""
+    if frappe.has_permission("Patient", "read", doc=patient):
+        return
+
+    if not is_patient_user(patient):
+        frappe.throw("You are not allowed to view this patient's history.", frappe.PermissionError)
+
+
+@frappe.whitelist()
+def get_patient_timeline(patient, start=0, page_length=DEFAULT_PAGE_LENGTH):
+    """
+    One page of a patient's encounters, newest first, with vitals, prescriptions
+    and services merged in, read across hot and archived encounters. A page
+    costs the same number of queries however many encounters or child rows it holds.
+    """
+    check_patient_access(patient)
+
+    start = max(cint(start), 0)
+    page_length = min(max(cint(page_length), 1), MAX_PAGE_LENGTH)
+
+    fields = list(ENCOUNTER_FIELDS)
+    # Practitioners see the raw notes; the patient portal gets the summary only.
+    if frappe.has_permission("Patient Encounter", "read"):
+        fields.append("clinical_notes")
+
+    encounters = get_all_with_archive(
+        "Patient Encounter",
+        filters={"patient": patient},
+        fields=fields,
+        order_by="encounter_datetime desc, name desc",
+        limit_start=start,
+        limit_page_length=page_length + 1,
+    )
+    has_more = len(encounters) > page_length
+    encounters = encounters[:page_length]
+
+    children = get_child_rows(
+        "Patient Encounter", [e.name for e in encounters], ENCOUNTER_CHILD_TABLES
+    )
+    for encounter in encounters:
+        encounter.update(children[encounter.name])
+
+    return {
+        "patient": patient,
+        "encounters": encounters,
+        "has_more": has_more,
+        "next_start": start + len(encounters) if has_more else None,
+    }
@@ -0,0 +1,254 @@
+import re
+
+import frappe
+import numpy as np
+from frappe.utils import add_days, get_datetime, now_datetime
+
+from medinova.timeline import check_patient_access
+
+DEFAULT_WINDOW_DAYS = 7
+
+# Canonical vital codes: display unit, recognised names and the normal range used for flags.
+VITAL_DEFINITIONS = {
+    "blood_pressure": {
+        "unit": "mmHg",
+        "aliases": ["bp", "b.p.", "b/p", "blood pressure", "blood_pressure"],
+        "range": {"systolic": (90, 140), "diastolic": (60, 90)},
+    },
+    "heart_rate": {
+        "unit": "bpm",
+        "aliases": ["hr", "pulse", "pulse rate", "pr", "heart rate", "heart_rate"],
+        "range": {"value": (60, 100)},
+    },
+    "temperature": {
+        "unit": "°C",
+        "aliases": ["temp", "temperature", "t", "body temperature"],
+        "range": {"value": (36.1, 37.8)},
+    },
+    "spo2": {
+        "unit": "%",
+        "aliases": ["spo2", "sp02", "sao2", "o2 sat", "oxygen saturation", "saturation"],
+        "range": {"value": (95, 100)},
+    },
+    "respiratory_rate": {
+        "unit": "/min",
+        "aliases": ["rr", "resp rate", "respiratory rate", "respiration", "respiratory_rate"],
+        "range": {"value": (12, 20)},
+    },
+    "glucose": {
+        "unit": "mg/dL",
+        "aliases": ["glucose", "blood sugar", "blood glucose", "bs", "bsl", "fbs", "rbs", "grbs", "sugar"],
+        "range": {"value": (70, 140)},
+    },
+    "weight": {"unit": "kg", "aliases": ["weight", "wt", "body weight"], "range": {}},
+    "height": {"unit": "cm", "aliases": ["height", "ht"], "range": {}},
+}
+
+VITAL_ALIASES = {
+    alias: code for code, definition in VITAL_DEFINITIONS.items() for alias in definition["aliases"]
+}
+
+# Factors to the canonical unit; a reading in any other unit is skipped rather than stored as-is.
+UNIT_FACTORS = {
+    "weight": {
+        "kg": 1, "kgs": 1, "kilo": 1, "kilos": 1, "kilogram": 1, "kilograms": 1,
+        "lb": 0.45359237, "lbs": 0.45359237, "pound": 0.45359237, "pounds": 0.45359237,
+    },
+    "height": {
+        "cm": 1, "cms": 1, "centimetre": 1, "centimeter": 1, "centimetres": 1, "centimeters": 1,
+        "m": 100, "metre": 100, "meter": 100, "metres": 100, "meters": 100,
+        "in": 2.54, "inch": 2.54, "inches": 2.54, '"': 2.54,
+        "ft": 30.48, "foot": 30.48, "feet": 30.48, "'": 30.48,
+    },
+}
+
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+FEET_INCHES = re.compile(r"""(\d+(?:\.\d+)?)\s*(?:'|ft|foot|feet)\.?\s*(?:(\d+(?:\.\d+)?)\s*(?:"|''|in|inch|inches)?)?""")
+
+
+def get_vital_code(vital_name):
+    name = re.sub(r"\s+", " ", (vital_name or "").strip().lower())
+    return VITAL_ALIASES.get(name) or VITAL_ALIASES.get(name.replace(" ", ""))
+
+
+def to_canonical(code, value, units):
+    """
+    Converts a reading to the canonical unit of its vital code, or None when the
+    units are not ones the code can be measured in.
+    """
+    units = (units or "").strip().lower()
+
+    if code == "temperature" and ("f" in units or (not units and value > 45)):
+        return round((value - 32) * 5 / 9, 2)
+    if code == "glucose" and ("mmol" in units or (not units and value < 35)):
+        return round(value * 18.016, 1)
+    if code in UNIT_FACTORS and units:
+        factor = UNIT_FACTORS[code].get(units.rstrip("."))
+        if factor is None:
+            return None
+        return round(value * factor, 2 if code == "weight" else 1)
+    return value
+
+
+def normalise_vital(vital_name, value, units=None):
+    """
+    Parses one free-text Vitals row into a typed reading, or None when the
+    name is unknown, the value has no number in it or the units are not
+    recognised for the vital.
+    """
+    code = get_vital_code(vital_name)
+    if not code:
+        return None
+
+    numbers = [float(n) for n in NUMBER.findall(str(value or ""))]
+    if not numbers:
+        return None
+
+    reading = {"vital_code": code, "unit": VITAL_DEFINITIONS[code]["unit"]}
+    if code == "blood_pressure":
+        if len(numbers) < 2:
+            return None
+        reading.update(systolic=numbers[0], diastolic=numbers[1], value=numbers[0])
+    elif code == "height" and (feet_inches := FEET_INCHES.search(str(value))):
+        # 5'9" or 5 ft 9 in; the units column adds nothing once the value names them.
+        feet, inches = feet_inches.groups()
+        reading["value"] = round((float(feet) * 12 + float(inches or 0)) * 2.54, 1)
+    else:
+        reading["value"] = to_canonical(code, numbers[0], units)
+        if reading["value"] is None:
+            return None
+
+    return reading
+
+
+def build_encounter_readings(encounter, vitals):
+    fallback_time = encounter.get("encounter_datetime") or encounter.get("creation") or now_datetime()
+    readings = []
+    for row in vitals:
+        reading = normalise_vital(row.get("vital_name"), row.get("value"), row.get("units"))
+        if not reading:
+            continue
+        reading.update(
+            patient=encounter.get("patient"),
+            encounter=encounter.get("name"),
+            measured_at=row.get("measured_at") or fallback_time,
+            raw_name=row.get("vital_name"),
+            raw_value=row.get("value"),
+            raw_units=row.get("units"),
+        )
+        readings.append(reading)
+    return readings
+
+
+READING_FIELDS = [
+    "patient", "encounter", "vital_code", "measured_at", "value",
+    "systolic", "diastolic", "unit", "raw_name", "raw_value", "raw_units",
+]
+
+
+def insert_readings(readings):
+    if not readings:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        "Vital Reading",
+        fields=["name", "creation", "modified", "owner", "modified_by", *READING_FIELDS],
+        values=[
+            (frappe.generate_hash(length=12), now, now, user, user, *(r.get(f) for f in READING_FIELDS))
+            for r in readings
+        ],
+    )
+
+
+def sync_encounter_vitals(encounter):
+    """Rewrites the time-series rows of one encounter from its Vitals child table."""
+    frappe.db.delete("Vital Reading", {"encounter": encounter.name})
+    if encounter.patient:
+        insert_readings(build_encounter_readings(encounter.as_dict(), encounter.vitals))
+
+
+def delete_encounter_vitals(encounter):
+    frappe.db.delete("Vital Reading", {"encounter": encounter.name})
+
+
+def rolling_mean(timestamps, values, window_secs):
+    """Mean of each reading and every earlier reading within `window_secs`, for irregular timestamps."""
+    left = np.searchsorted(timestamps, timestamps - window_secs, side="left")
+    sums = np.concatenate([[0.0], np.cumsum(values)])
+    right = np.arange(1, len(values) + 1)
+    return (sums[right] - sums[left]) / (right - left)
+
+
+def summarise_series(timestamps, values, window_secs, normal_range=None):
+    series = {
+        "values": values.tolist(),
+        "rolling_mean": np.round(rolling_mean(timestamps, values, window_secs), 2).tolist(),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": round(float(values.mean()), 2),
+    }
+    if normal_range:
+        low, high = normal_range
+        series["normal_range"] = [low, high]
+        series["out_of_range"] = ((values < low) | (values > high)).tolist()
+    return series
+
+
+@frappe.whitelist()
+def get_vital_trend(patient, vital_code, from_datetime=None, to_datetime=None, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Trend for one vital of one patient: the readings in the requested period
+    (one range read on the patient, vital_code, measured_at index), a rolling
+    mean over `window_days`, min / max / mean and out-of-range flags.
+    """
+    check_patient_access(patient)
+
+    if vital_code not in VITAL_DEFINITIONS:
+        vital_code = get_vital_code(vital_code)
+        if not vital_code:
+            frappe.throw("Unknown vital code.")
+
+    to_datetime = get_datetime(to_datetime) if to_datetime else now_datetime()
+    from_datetime = get_datetime(from_datetime) if from_datetime else add_days(to_datetime, -365)
+
+    rows = frappe.db.sql(
+        """
+        SELECT measured_at, value, systolic, diastolic
+        FROM `tabVital Reading`
+        WHERE patient = %s AND vital_code = %s AND measured_at BETWEEN %s AND %s
+        ORDER BY measured_at
+        """,
+        (patient, vital_code, from_datetime, to_datetime),
+    )
+
+    definition = VITAL_DEFINITIONS[vital_code]
+    result = {
+        "patient": patient,
+        "vital_code": vital_code,
+        "unit": definition["unit"],
+        "measured_at": [],
+        "series": {},
+    }
+    if not rows:
+        return result
+
+    measured_at = [row[0] for row in rows]
+    timestamps = np.array([m.timestamp() for m in measured_at])
+    window_secs = float(window_days) * 86400
+    result["measured_at"] = [str(m) for m in measured_at]
+
+    if vital_code == "blood_pressure":
+        data = np.array([[row[2] or 0, row[3] or 0] for row in rows], dtype=float)
+        for i, key in enumerate(("systolic", "diastolic")):
+            result["series"][key] = summarise_series(
+                timestamps, data[:, i], window_secs, definition["range"].get(key)
+            )
+    else:
+        values = np.array([row[1] or 0 for row in rows], dtype=float)
+        result["series"]["value"] = summarise_series(
+            timestamps, values, window_secs, definition["range"].get("value")
+        )
+
+    return result
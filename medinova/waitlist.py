@@ -0,0 +1,358 @@
+import frappe
+from frappe.utils import add_to_date, get_time, getdate, now_datetime
+
+from medinova.portal import is_patient_user
+
+DEFAULT_HOLD_MINUTES = 15
+
+
+def get_hold_minutes():
+    return int(frappe.conf.get("medinova_waitlist_hold_minutes") or DEFAULT_HOLD_MINUTES)
+
+
+def to_time_str(value):
+    """Normalises str / timedelta / time values to 'HH:MM:SS' for comparisons and job kwargs."""
+    return get_time(value).strftime("%H:%M:%S") if value else None
+
+
+def _slot_from(doc, source_appointment):
+    return {
+        "practitioner": doc.practitioner,
+        "appointment_date": str(getdate(doc.appointment_date)),
+        "start_time": to_time_str(doc.start_time),
+        "end_time": to_time_str(doc.end_time),
+        "appointment_type": doc.appointment_type,
+        "source_appointment": source_appointment,
+    }
+
+
+def get_released_slots(doc, method=None):
+    """
+    Returns the slots a Make Appointment change gives back to the practitioner:
+    a cancellation frees the current slot, a reschedule frees the previous one.
+    """
+    if method == "on_trash":
+        if doc.status == "Cancelled":
+            return []
+        return [_slot_from(doc, None)]
+
+    previous = doc.get_doc_before_save()
+    if not previous or previous.status == "Cancelled":
+        return []
+
+    if doc.status == "Cancelled":
+        return [_slot_from(previous, doc.name)]
+
+    moved = (
+        previous.practitioner != doc.practitioner
+        or getdate(previous.appointment_date) != getdate(doc.appointment_date)
+        or to_time_str(previous.start_time) != to_time_str(doc.start_time)
+    )
+    if moved:
+        return [_slot_from(previous, doc.name)]
+
+    return []
+
+
+def on_appointment_change(doc, method=None):
+    """
+    Queues a back-fill job for every slot this change released. The job runs
+    right after the booking transaction commits, so offers go out within seconds.
+    """
+    for slot in get_released_slots(doc, method):
+        if not all([slot["practitioner"], slot["appointment_date"], slot["start_time"], slot["end_time"]]):
+            continue
+        frappe.enqueue(
+            "medinova.waitlist.offer_released_slot",
+            queue="short",
+            enqueue_after_commit=True,
+            **slot,
+        )
+
+
+def get_active_holds(practitioner, appointment_date):
+    """Intervals of a practitioner's day held for waitlisted patients."""
+    return frappe.get_all(
+        "Appointment Waitlist",
+        filters={
+            "status": "Offered",
+            "offered_practitioner": practitioner,
+            "offered_date": appointment_date,
+            "offer_expires_at": (">", now_datetime()),
+        },
+        fields=["offered_start_time as start_time", "offered_end_time as end_time"],
+    )
+
+
+def get_active_hold(practitioner, appointment_date, start_time, end_time, patient=None):
+    """Returns the waitlist entry holding an overlapping slot for someone other than `patient`."""
+    filters = {
+        "status": "Offered",
+        "offered_practitioner": practitioner,
+        "offered_date": appointment_date,
+        "offered_start_time": ("<", end_time),
+        "offered_end_time": (">", start_time),
+        "offer_expires_at": (">", now_datetime()),
+    }
+    if patient:
+        filters["patient"] = ("!=", patient)
+
+    return frappe.db.get_value("Appointment Waitlist", filters, "name")
+
+
+def find_waitlist_match(practitioner, appointment_date, appointment_type, exclude_patients=None, exclude_entries=None):
+    """
+    Picks the highest-priority, longest-waiting entry for a freed slot. The
+    practitioner-specific and specialization-wide lookups each hit their own
+    index instead of OR-ing across both columns.
+    """
+    specialization = frappe.db.get_value("Practitioner", practitioner, "specialization")
+
+    base_filters = {
+        "status": "Waiting",
+        "appointment_type": appointment_type,
+        "from_date": ("<=", appointment_date),
+        "to_date": (">=", appointment_date),
+    }
+    if exclude_patients:
+        base_filters["patient"] = ("not in", exclude_patients)
+    if exclude_entries:
+        base_filters["name"] = ("not in", exclude_entries)
+
+    lookups = [dict(base_filters, practitioner=practitioner)]
+    if specialization:
+        lookups.append(dict(base_filters, practitioner=("is", "not set"), specialization=specialization))
+
+    candidates = []
+    for filters in lookups:
+        candidates += frappe.get_all(
+            "Appointment Waitlist",
+            filters=filters,
+            fields=["name", "patient", "priority", "creation"],
+            order_by="priority desc, creation asc",
+            limit=1,
+        )
+
+    if not candidates:
+        return None
+
+    return min(candidates, key=lambda c: (-(c.priority or 0), c.creation))
+
+
+def is_slot_free(practitioner, appointment_date, start_time, end_time):
+    booked = frappe.db.exists(
+        "Make Appointment",
+        {
+            "practitioner": practitioner,
+            "appointment_date": appointment_date,
+            "status": ("!=", "Cancelled"),
+            "start_time": ("<", end_time),
+            "end_time": (">", start_time),
+        },
+    )
+    return not booked and not get_active_hold(practitioner, appointment_date, start_time, end_time)
+
+
+def offer_released_slot(
+    practitioner,
+    appointment_date,
+    start_time,
+    end_time,
+    appointment_type,
+    source_appointment=None,
+    exclude_entries=None,
+):
+    """Background job: offers a freed slot to the next eligible waitlisted patient with a hold."""
+    # Serialise offers per practitioner so two freed slots never race for the same hold.
+    frappe.db.get_value("Practitioner", practitioner, "name", for_update=True)
+
+    if not is_slot_free(practitioner, appointment_date, start_time, end_time):
+        return None
+
+    exclude_patients = []
+    if source_appointment:
+        cancelled_by = frappe.db.get_value("Make Appointment", source_appointment, "patient")
+        if cancelled_by:
+            exclude_patients.append(cancelled_by)
+
+    match = find_waitlist_match(
+        practitioner, appointment_date, appointment_type, exclude_patients, exclude_entries
+    )
+    if not match:
+        return None
+
+    entry = frappe.get_doc("Appointment Waitlist", match.name)
+    entry.update(
+        {
+            "status": "Offered",
+            "offered_practitioner": practitioner,
+            "offered_date": appointment_date,
+            "offered_start_time": start_time,
+            "offered_end_time": end_time,
+            "offer_expires_at": add_to_date(now_datetime(), minutes=get_hold_minutes()),
+            "source_appointment": source_appointment,
+        }
+    )
+    entry.save(ignore_permissions=True)
+    # medinova.slots imports this module, so the import is deferred to call time.
+    from medinova.slots import publish_hold_change
+
+    publish_hold_change(
+        {
+            "practitioner": practitioner,
+            "appointment_date": appointment_date,
+            "start_time": start_time,
+            "end_time": end_time,
+        },
+        "booked",
+    )
+    notify_offer(entry)
+    return entry.name
+
+
+def notify_offer(entry):
+    patient = frappe.db.get_value("Patient", entry.patient, ["full_name", "email", "linked_user"], as_dict=True)
+    if not patient:
+        return
+
+    message = (
+        f"Good news, {patient.full_name or entry.patient}! A <b>{entry.appointment_type}</b> slot with "
+        f"<b>{entry.offered_practitioner}</b> opened up on <b>{frappe.utils.formatdate(entry.offered_date)}</b> "
+        f"at <b>{entry.offered_start_time}</b>. We are holding it for you until {entry.offer_expires_at}."
+    )
+
+    if patient.linked_user:
+        frappe.publish_realtime(
+            "medinova_waitlist_offer",
+            {"waitlist_entry": entry.name, "message": message},
+            user=patient.linked_user,
+            after_commit=True,
+        )
+
+    if patient.email:
+        frappe.sendmail(
+            recipients=[patient.email],
+            subject="An appointment slot is available for you",
+            message=message,
+            reference_doctype=entry.doctype,
+            reference_name=entry.name,
+        )
+
+
+def _get_offer_for_session(waitlist_entry):
+    entry = frappe.get_doc("Appointment Waitlist", waitlist_entry)
+
+    if not frappe.has_permission("Appointment Waitlist", "write", doc=entry):
+        if not is_patient_user(entry.patient):
+            frappe.throw("You are not allowed to respond to this offer.", frappe.PermissionError)
+
+    if entry.status != "Offered":
+        frappe.throw(f"Waitlist entry {entry.name} has no open offer.")
+
+    return entry
+
+
+@frappe.whitelist()
+def join_waitlist(patient, appointment_type, from_date, to_date, practitioner=None, specialization=None):
+    """
+    Staff with create rights can waitlist any patient; portal users only the
+    patients linked to their account. The entry always starts at default priority.
+    """
+    if not frappe.has_permission("Appointment Waitlist", "create"):
+        if not is_patient_user(patient):
+            frappe.throw("You can only join the waitlist for your own patient record.", frappe.PermissionError)
+
+    entry = frappe.get_doc(
+        {
+            "doctype": "Appointment Waitlist",
+            "patient": patient,
+            "appointment_type": appointment_type,
+            "practitioner": practitioner,
+            "specialization": specialization,
+            "from_date": from_date,
+            "to_date": to_date,
+        }
+    )
+    entry.insert(ignore_permissions=True)
+    return entry.name
+
+
+@frappe.whitelist()
+def accept_waitlist_offer(waitlist_entry):
+    """Books the held slot for the waitlisted patient."""
+    entry = _get_offer_for_session(waitlist_entry)
+
+    if entry.offer_expires_at and now_datetime() > frappe.utils.get_datetime(entry.offer_expires_at):
+        frappe.throw("This offer has expired.")
+
+    appointment = frappe.get_doc(
+        {
+            "doctype": "Make Appointment",
+            "patient": entry.patient,
+            "practitioner": entry.offered_practitioner,
+            "appointment_date": entry.offered_date,
+            "start_time": entry.offered_start_time,
+            "appointment_type": entry.appointment_type,
+            "status": "Booked",
+        }
+    )
+    appointment.insert(ignore_permissions=True)
+
+    entry.status = "Booked"
+    entry.booked_appointment = appointment.name
+    entry.save(ignore_permissions=True)
+
+    return {"appointment_name": appointment.name}
+
+
+@frappe.whitelist()
+def decline_waitlist_offer(waitlist_entry):
+    """Releases the hold, keeps the patient waiting and passes the slot on."""
+    entry = _get_offer_for_session(waitlist_entry)
+    slot = release_offer(entry, "Waiting")
+    slot["exclude_entries"] = [entry.name]
+    frappe.enqueue("medinova.waitlist.offer_released_slot", queue="short", enqueue_after_commit=True, **slot)
+
+
+def release_offer(entry, status):
+    slot = {
+        "practitioner": entry.offered_practitioner,
+        "appointment_date": str(getdate(entry.offered_date)),
+        "start_time": to_time_str(entry.offered_start_time),
+        "end_time": to_time_str(entry.offered_end_time),
+        "appointment_type": entry.appointment_type,
+        "source_appointment": entry.source_appointment,
+    }
+    entry.update(
+        {
+            "status": status,
+            "offered_practitioner": None,
+            "offered_date": None,
+            "offered_start_time": None,
+            "offered_end_time": None,
+            "offer_expires_at": None,
+            "source_appointment": None,
+        }
+    )
+    entry.save(ignore_permissions=True)
+    from medinova.slots import publish_hold_change
+
+    publish_hold_change(slot, "released")
+    return slot
+
+
+def expire_waitlist_offers():
+    """
+    Scheduled: lapses holds that were not taken up and re-offers their slots.
+    This only reads the (status, offer_expires_at) index, never the whole waitlist.
+    """
+    expired = frappe.get_all(
+        "Appointment Waitlist",
+        filters={"status": "Offered", "offer_expires_at": ("<", now_datetime())},
+        pluck="name",
+    )
+
+    for name in expired:
+        entry = frappe.get_doc("Appointment Waitlist", name)
+        slot = release_offer(entry, "Expired")
+        frappe.enqueue("medinova.waitlist.offer_released_slot", queue="short", enqueue_after_commit=True, **slot)